@@ -1,14 +1,295 @@
+import logging
 import os
-from neo4j import GraphDatabase
+import time
+from neo4j import READ_ACCESS, AsyncGraphDatabase, GraphDatabase, NotificationSeverity
+from neo4j.exceptions import ClientError
 
+from app.metrics import observe_query, observe_query_error
+
+from . import queries
+from .cache import EntityCache
+from .queries import QUERIES, NamedQuery
+from .slow_queries import SlowQueryLog
+
+logger = logging.getLogger(__name__)
+
+# bolt://host talks to a single server; neo4j://host asks the cluster for a routing
+# table, so READ sessions below are spread over secondaries / read replicas.
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://neo4j:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
 
+# Connection pool tuning (sizes per API worker process; timeouts/lifetimes in seconds)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+# idle connections older than this are pinged before reuse; unset = no liveness check
+NEO4J_LIVENESS_CHECK_TIMEOUT = os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT")
+# connections opened at startup so the first requests do not pay the handshake
+NEO4J_WARMUP_CONNECTIONS = int(os.getenv("NEO4J_WARMUP_CONNECTIONS", "4"))
+# EXPLAIN every registered query at startup; strict = planner warnings (unknown label/property) abort too
+NEO4J_WARMUP_QUERIES = os.getenv("NEO4J_WARMUP_QUERIES", "1") == "1"
+NEO4J_WARMUP_STRICT = os.getenv("NEO4J_WARMUP_STRICT", "0") == "1"
+
 _driver = None
+_async_driver = None
+
+
+def driver_config() -> dict:
+    config = {
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+    }
+    if NEO4J_LIVENESS_CHECK_TIMEOUT:
+        config["liveness_check_timeout"] = float(NEO4J_LIVENESS_CHECK_TIMEOUT)
+    return config
+
 
 def get_driver():
     global _driver
     if _driver is None:
-        _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD), **driver_config())
     return _driver
+
+
+def close_driver() -> None:
+    global _driver
+    if _driver is not None:
+        _driver.close()
+        _driver = None
+
+
+# Async driver: used by the API routers (one event loop, no threadpool cap).
+# The sync driver above stays for scripts/, model training and tests.
+
+def get_async_driver():
+    global _async_driver
+    if _async_driver is None:
+        _async_driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD), **driver_config())
+    return _async_driver
+
+
+async def close_async_driver() -> None:
+    global _async_driver
+    if _async_driver is not None:
+        await _async_driver.close()
+        _async_driver = None
+
+
+async def warm_up_async_pool(driver, connections: int = NEO4J_WARMUP_CONNECTIONS) -> int:
+    """
+    Open `connections` pooled connections up front: each open transaction holds
+    its own connection, so keeping them open together forces distinct connections.
+    """
+    sessions, transactions = [], []
+    try:
+        for _ in range(connections):
+            session = driver.session()
+            sessions.append(session)
+            tx = await session.begin_transaction()
+            transactions.append(tx)
+            await (await tx.run("RETURN 1")).consume()
+    finally:
+        for tx in transactions:
+            await tx.close()
+        for session in sessions:
+            await session.close()
+    return len(transactions)
+
+
+class QueryWarmupError(RuntimeError):
+    """A registered query does not plan against the connected database."""
+
+
+async def warm_up_queries(driver, named=None, strict: bool = NEO4J_WARMUP_STRICT) -> dict:
+    """
+    EXPLAIN every registered query (or the NamedQuery objects in named) once so Neo4j
+    caches its plan before the first request. Errors (syntax, unknown procedure, ...) raise QueryWarmupError unless the
+    query is optional; planner warnings such as unknown labels or properties (schema
+    drift, or simply an empty database) are logged, and raise too when strict.
+    """
+    report = {"planned": [], "skipped": [], "warnings": []}
+    async with driver.session(default_access_mode=READ_ACCESS) as session:
+        for query in named if named is not None else QUERIES.values():
+            try:
+                result = await session.run("EXPLAIN " + query.text, query.params)
+                summary = await result.consume()
+            except ClientError as e:
+                if query.optional:
+                    logger.warning("Skipping plan warm-up of optional query %s: %s", query.name, e.message)
+                    report["skipped"].append(query.name)
+                    continue
+                raise QueryWarmupError(f"Query {query.name} failed to plan: {e.message}") from e
+
+            report["planned"].append(query.name)
+            for status in summary.gql_status_objects:
+                if status.is_notification and status.severity == NotificationSeverity.WARNING:
+                    report["warnings"].append((query.name, status.gql_status, status.status_description))
+                    logger.warning("Query %s: %s %s", query.name, status.gql_status, status.status_description)
+
+    if strict and report["warnings"]:
+        names = sorted({name for name, _, _ in report["warnings"]})
+        raise QueryWarmupError(f"Planner warnings for {', '.join(names)} (NEO4J_WARMUP_STRICT=1)")
+    return report
+
+
+# ---------------------------------------------------------------------
+# Read access: managed READ transactions (routed to replicas, retried on
+# transient errors). Query-only endpoints go through these helpers, with
+# either a registered NamedQuery (app/database/queries.py) or raw Cypher.
+# ---------------------------------------------------------------------
+def query_text(query) -> str:
+    return query.text if isinstance(query, NamedQuery) else query
+
+
+def query_name(query) -> str:
+    return query.name if isinstance(query, NamedQuery) else "adhoc"
+
+
+async def _run_instrumented(tx, query, params: dict, single: bool):
+    # every read goes through here: client latency, server timings from the summary, rows, errors
+    name = query_name(query)
+    t0 = time.perf_counter()
+    try:
+        result = await tx.run(query_text(query), params)
+        if single:
+            record = await result.single()
+            rows = record is not None
+            value = dict(record) if record is not None else None
+        else:
+            value = await result.data()
+            rows = len(value)
+        summary = await result.consume()
+    except Exception as e:
+        observe_query_error(name, e)
+        raise
+    seconds = time.perf_counter() - t0
+    observe_query(name, seconds, rows, summary)
+    slow_query_log.observe(query, params, seconds)
+    return value
+
+
+async def fetch_rows(tx, query, params: dict) -> list:
+    return await _run_instrumented(tx, query, params, single=False)
+
+
+async def fetch_single(tx, query, params: dict):
+    return await _run_instrumented(tx, query, params, single=True)
+
+
+def read_session():
+    return get_async_driver().session(default_access_mode=READ_ACCESS)
+
+
+slow_query_log = SlowQueryLog(session_factory=read_session)
+
+
+async def stream_rows(query, /, **params):
+    """
+    Yield the rows of a read-only query as dicts while the result is consumed; the
+    driver pulls records in fetch_size chunks, so memory stays bounded. Auto-commit
+    on a READ session: a managed transaction would have to buffer the whole result.
+    """
+    name = query_name(query)
+    t0 = time.perf_counter()
+    rows = 0
+    async with read_session() as session:
+        try:
+            result = await session.run(query_text(query), params)
+            async for record in result:
+                rows += 1
+                yield dict(record)
+            summary = await result.consume()
+        except Exception as e:
+            observe_query_error(name, e)
+            raise
+    observe_query(name, time.perf_counter() - t0, rows, summary)
+
+
+async def read_rows(query, /, **params) -> list:
+    """All rows of a read-only query, as dicts."""
+    async with read_session() as session:
+        return await session.execute_read(fetch_rows, query, params)
+
+
+async def read_single(query, /, **params):
+    """First row of a read-only query as a dict, or None."""
+    async with read_session() as session:
+        return await session.execute_read(fetch_single, query, params)
+
+
+# ---------------------------------------------------------------------
+# Lookups by id: ids are stored as integers by the seeder, path parameters
+# arrive as strings. Coerce first so the equality hits the unique index.
+# ---------------------------------------------------------------------
+def coerce_id(value):
+    """'42' -> 42; anything that is not an integer literal is returned unchanged."""
+    if isinstance(value, str):
+        text = value.strip()
+        if text.lstrip("+-").isdigit():
+            return int(text)
+    return value
+
+
+async def read_by_id(query, key: str, value, **params):
+    """
+    read_single() with the id coerced to the stored type. An integer-looking id that
+    matches nothing is retried as a string, for entities stored with string ids.
+    Other query parameters are passed through.
+    """
+    record = await read_single(query, **params, **{key: coerce_id(value)})
+    if record is None and isinstance(coerce_id(value), int) and isinstance(value, str):
+        record = await read_single(query, **params, **{key: value})
+    return record
+
+
+async def read_by_ids(query, ids: list) -> dict:
+    """
+    Batch read_by_id(): query takes $ids and returns an `id` column. Returns
+    {requested id: record or None}; duplicates are looked up once.
+    """
+    coerced = {raw: coerce_id(raw) for raw in ids}
+    rows = await read_rows(query, ids=list(dict.fromkeys(coerced.values())))
+    found = {row["id"]: row for row in rows}
+
+    retry = [raw for raw, key in coerced.items() if key not in found and isinstance(raw, str) and raw != key]
+    if retry:
+        found.update({row["id"]: row for row in await read_rows(query, ids=retry)})
+
+    return {raw: found.get(key, found.get(raw)) for raw, key in coerced.items()}
+
+
+# ---------------------------------------------------------------------
+# Cached lookups: order / product documents through the entity cache
+# (app/database/cache.py), keyed by the graph version the seeder stamps.
+# `entity` is the record column that is null when the id matched nothing.
+# ---------------------------------------------------------------------
+async def graph_version():
+    record = await read_single(queries.GRAPH_VERSION)
+    return record["version"] if record is not None else None
+
+
+entity_cache = EntityCache(version_source=graph_version)
+
+
+def _found(record, entity: str):
+    return record if record is not None and record[entity] is not None else None
+
+
+async def cached_by_id(entity: str, query, key: str, value):
+    """read_by_id() through entity_cache; None when not found (misses are not cached)."""
+
+    async def load():
+        return _found(await read_by_id(query, key, value), entity)
+
+    return await entity_cache.get(entity, coerce_id(value), load)
+
+
+async def cached_by_ids(entity: str, query, ids: list) -> dict:
+    """read_by_ids() through entity_cache: only the ids that are not cached are queried."""
+
+    async def load(missing):
+        return {raw: _found(record, entity) for raw, record in (await read_by_ids(query, missing)).items()}
+
+    return await entity_cache.get_many(entity, ids, load)
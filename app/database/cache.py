@@ -0,0 +1,206 @@
+"""
+Read-through cache of order / product documents (the records of ORDER_DETAILS,
+PRODUCT_DETAILS and the batch lookups).
+
+Keys include the graph version stamp, (:GraphMeta {key: 'graph'}).version, which
+scripts/seed_data.py sets at the end of every run: after a reseed no request asks
+for an old key again, so everything is invalidated at once. The version itself is
+re-read at most every ENTITY_CACHE_VERSION_INTERVAL seconds.
+
+The default backend is an LRU + TTL dict per worker process. With
+ENTITY_CACHE_REDIS_URL set, entries are shared through Redis instead (any object
+with async get / set / clear can stand in for it).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import orjson
+
+from app.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # the shared backend is optional
+    redis = None
+
+ENTITY_CACHE_ENABLED = os.getenv("ENTITY_CACHE_ENABLED", "1") == "1"
+ENTITY_CACHE_MAX_ENTRIES = int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "10000"))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "300"))
+# staleness bound after a reseed: how long a worker may keep using the previous version
+ENTITY_CACHE_VERSION_INTERVAL = float(os.getenv("ENTITY_CACHE_VERSION_INTERVAL", "5"))
+ENTITY_CACHE_REDIS_URL = os.getenv("ENTITY_CACHE_REDIS_URL", "")
+
+CacheKey = Tuple[Hashable, str, str]  # (graph version, entity, id)
+
+
+class MemoryBackend:
+    """LRU + TTL dict, per worker process."""
+
+    def __init__(self, max_entries: int = ENTITY_CACHE_MAX_ENTRIES, ttl: float = ENTITY_CACHE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: CacheKey) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            CACHE_EVICTIONS.labels("expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: CacheKey, value: dict) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.labels("size").inc()
+
+    async def clear(self) -> None:
+        if self._entries:
+            CACHE_EVICTIONS.labels("version").inc(len(self._entries))
+        self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Entries shared by every worker / replica. Redis applies the TTL; size-based
+    eviction is the server's maxmemory-policy (allkeys-lru).
+    """
+
+    def __init__(self, url: str, ttl: float = ENTITY_CACHE_TTL, prefix: str = "entity:"):
+        if redis is None:
+            raise RuntimeError("ENTITY_CACHE_REDIS_URL is set but the redis package is not installed")
+        self._client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, key: CacheKey) -> str:
+        return self.prefix + ":".join(str(part) for part in key)
+
+    async def get(self, key: CacheKey) -> Optional[dict]:
+        raw = await self._client.get(self._key(key))
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: CacheKey, value: dict) -> None:
+        await self._client.set(self._key(key), orjson.dumps(value), ex=max(1, int(self.ttl)))
+
+    async def clear(self) -> None:
+        # other workers may still be on the previous version: its keys simply expire
+        return None
+
+
+def default_backend():
+    if ENTITY_CACHE_REDIS_URL:
+        return RedisBackend(ENTITY_CACHE_REDIS_URL)
+    return MemoryBackend()
+
+
+class EntityCache:
+    def __init__(
+        self,
+        version_source: Callable[[], Awaitable[Hashable]],
+        backend=None,
+        version_interval: float = ENTITY_CACHE_VERSION_INTERVAL,
+        enabled: bool = ENTITY_CACHE_ENABLED,
+        clock=time.monotonic,
+    ):
+        self._version_source = version_source
+        self.backend = backend if backend is not None else default_backend()
+        self.version_interval = version_interval
+        self.enabled = enabled
+        self._clock = clock
+        self._version: Hashable = None
+        self._checked_at: Optional[float] = None
+        self._first_read: Optional[asyncio.Future] = None
+
+    async def version(self) -> Hashable:
+        """Current graph version, re-read from Neo4j at most every version_interval seconds."""
+        now = self._clock()
+        if self._checked_at is None:
+            return await self._read_first_version(now)
+        if now - self._checked_at >= self.version_interval:
+            # set first: concurrent requests keep the known version instead of all re-reading it
+            self._checked_at = now
+            version = await self._version_source()
+            if version != self._version:
+                self._version = version
+                # keys of the previous version can no longer be hit
+                await self.backend.clear()
+        return self._version
+
+    async def _read_first_version(self, now: float) -> Hashable:
+        # no version known yet: concurrent requests share one read and all wait for it,
+        # so no document is stored under a placeholder version
+        if self._first_read is None:
+            self._first_read = asyncio.ensure_future(self._version_source())
+        first_read = self._first_read
+        try:
+            version = await asyncio.shield(first_read)
+        finally:
+            if first_read.done() and self._first_read is first_read:
+                self._first_read = None  # a failed read is retried by the next request
+        if self._checked_at is None:
+            self._version, self._checked_at = version, now
+            await self.backend.clear()
+        return self._version
+
+    async def get(self, entity: str, key, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        """Cached document of entity `key`, else loader() (cached unless None)."""
+        if not self.enabled:
+            return await loader()
+        cache_key = (await self.version(), entity, str(key))
+        value = await self.backend.get(cache_key)
+        if value is not None:
+            CACHE_HITS.labels(entity).inc()
+            return value
+        CACHE_MISSES.labels(entity).inc()
+        value = await loader()
+        if value is not None:
+            await self.backend.set(cache_key, value)
+        return value
+
+    async def get_many(
+        self, entity: str, keys: Iterable, loader: Callable[[list], Awaitable[Dict]]
+    ) -> Dict:
+        """
+        get() for many keys: loader(missing keys) -> {key: document or None} is
+        called once, with the keys that were not cached.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled:
+            return await loader(keys)
+        version = await self.version()
+        found: Dict = {}
+        missing = []
+        for key in keys:
+            value = await self.backend.get((version, entity, str(key)))
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if found:
+            CACHE_HITS.labels(entity).inc(len(found))
+        if missing:
+            CACHE_MISSES.labels(entity).inc(len(missing))
+            loaded = await loader(missing)
+            for key in missing:
+                value = loaded.get(key)
+                found[key] = value
+                if value is not None:
+                    await self.backend.set((version, entity, str(key)), value)
+        return found
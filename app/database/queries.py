@@ -0,0 +1,668 @@
+"""
+Every Cypher query the API sends, in one place.
+
+Each entry has a name (used in logs and warm-up reports), the query text and
+sample parameters. The samples are never used to answer a request; they let
+startup EXPLAIN each query with the same parameter types the endpoints send,
+because Neo4j caches plans per query text *and* parameter types.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+
+@dataclass(frozen=True)
+class NamedQuery:
+    name: str
+    text: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    # optional queries depend on a plugin (GDS): a failed EXPLAIN is a warning, not a startup error
+    optional: bool = False
+
+
+QUERIES: Dict[str, NamedQuery] = {}
+
+
+def register(name: str, text: str, params: Dict[str, Any] | None = None, optional: bool = False) -> NamedQuery:
+    if name in QUERIES:
+        raise ValueError(f"Query {name!r} is already registered")
+    query = NamedQuery(name=name, text=text.strip(), params=params or {}, optional=optional)
+    QUERIES[name] = query
+    return query
+
+
+def get_query(name: str) -> NamedQuery:
+    return QUERIES[name]
+
+
+# ----------------------------
+# Health
+# ----------------------------
+HEALTH = register("health", "RETURN 1 AS ok")
+
+# version stamp set by scripts/seed_data.py after every run; keys the entity cache
+GRAPH_VERSION = register(
+    "graph.version",
+    """
+OPTIONAL MATCH (m:GraphMeta {key: 'graph'})
+RETURN m.version AS version
+""",
+)
+
+
+# ----------------------------
+# Map projections: exactly the fields of the response models (app/models/order.py),
+# missing properties come back as null. Rows can be returned by the routers as-is
+# and FastAPI's response_model validation is the only pass over them.
+# ----------------------------
+# dates are DATETIME properties, sent as ISO 8601 text ("2018-01-31T22:56:00Z")
+ORDER_MAP = (
+    "{.order_id, order_date: toString(o.order_date), shipping_date: toString(o.shipping_date), "
+    ".late_delivery_risk, .shipping_mode, .days_shipping_scheduled, .days_shipping_real, "
+    ".region, .delivery_status, .status}"
+)
+CUSTOMER_MAP = "{.customer_id, .first_name, .last_name, .city, .country}"
+PRODUCT_MAP = "{.product_id, .name, .price}"
+
+
+# ----------------------------
+# Orders / products
+# equality on the key property is served by the order_id_unique /
+# product_id_unique constraint indexes (NodeUniqueIndexSeek); see read_by_id()
+# ----------------------------
+ORDER_DETAILS = register(
+    "orders.details",
+    f"""
+MATCH (o:Order {{order_id: $order_id}})
+OPTIONAL MATCH (o)<-[:PLACED]-(c:Customer)
+OPTIONAL MATCH (o)-[:CONTAINS]->(p:Product)
+RETURN o {ORDER_MAP} AS order,
+       c {CUSTOMER_MAP} AS customer,
+       [p IN collect(p) | p {PRODUCT_MAP}] AS products
+""",
+    {"order_id": 1},
+)
+
+# A product's orders are listed newest first (dated orders by order_date, then undated
+# ones), ties by order_id; its customers by customer_id. The product document holds the
+# first PRODUCT_DETAILS_LIMIT of each (one more is read to tell whether there is a next
+# page); the rest is served by the keyset pages below.
+PRODUCT_DETAILS_LIMIT = 50
+PRODUCT_ORDERS_SORT = "o.order_date IS NULL, o.order_date DESC, o.order_id DESC"
+_PRODUCT_FIRST_PAGES = f"""
+CALL {{
+  WITH p
+  OPTIONAL MATCH (p)<-[:CONTAINS]-(o:Order)
+  WITH DISTINCT o
+  ORDER BY {PRODUCT_ORDERS_SORT}
+  LIMIT {PRODUCT_DETAILS_LIMIT + 1}
+  RETURN collect(o {ORDER_MAP}) AS orders
+}}
+CALL {{
+  WITH p
+  OPTIONAL MATCH (p)<-[:CONTAINS]-(:Order)<-[:PLACED]-(c:Customer)
+  WITH DISTINCT c
+  ORDER BY c.customer_id
+  LIMIT {PRODUCT_DETAILS_LIMIT + 1}
+  RETURN collect(c {CUSTOMER_MAP}) AS customers
+}}"""
+
+PRODUCT_DETAILS = register(
+    "products.details",
+    f"""
+MATCH (p:Product {{product_id: $product_id}})
+{_PRODUCT_FIRST_PAGES}
+RETURN
+  p {PRODUCT_MAP} AS product,
+  orders,
+  customers
+""",
+    {"product_id": 1},
+)
+
+
+# batch variants: one UNWIND, one index seek per id; `id` echoes the key it matched
+ORDERS_BY_IDS = register(
+    "orders.by_ids",
+    f"""
+UNWIND $ids AS id
+MATCH (o:Order {{order_id: id}})
+OPTIONAL MATCH (o)<-[:PLACED]-(c:Customer)
+OPTIONAL MATCH (o)-[:CONTAINS]->(p:Product)
+RETURN id,
+       o {ORDER_MAP} AS order,
+       c {CUSTOMER_MAP} AS customer,
+       [p IN collect(p) | p {PRODUCT_MAP}] AS products
+""",
+    {"ids": [1, 2]},
+)
+
+PRODUCTS_BY_IDS = register(
+    "products.by_ids",
+    f"""
+UNWIND $ids AS id
+MATCH (p:Product {{product_id: id}})
+{_PRODUCT_FIRST_PAGES}
+RETURN
+  id,
+  p {PRODUCT_MAP} AS product,
+  orders,
+  customers
+""",
+    {"ids": [1, 2]},
+)
+
+
+PRODUCT_CORE = register(
+    "products.core",
+    f"""
+MATCH (p:Product {{product_id: $product_id}})
+RETURN p {PRODUCT_MAP} AS product
+""",
+    {"product_id": 1},
+)
+
+# Keyset pages: the cursor is the (order_date, order_id) / customer_id of the last row
+# served. The seek predicate filters the product's orders while they are expanded, so
+# DISTINCT and the sort (Top) only see the rows after the cursor. An undated last row
+# (after_date null) continues with the undated orders. One row per existing product,
+# none for an unknown one: no separate existence lookup.
+PRODUCT_ORDERS_PAGE = register(
+    "products.orders_page",
+    f"""
+MATCH (p:Product {{product_id: $product_id}})
+OPTIONAL MATCH (p)<-[:CONTAINS]-(o:Order)
+WHERE $after_id IS NULL
+   OR o.order_date < datetime($after_date)
+   OR (o.order_date = datetime($after_date) AND o.order_id < $after_id)
+   OR (o.order_date IS NULL AND ($after_date IS NOT NULL OR o.order_id < $after_id))
+WITH DISTINCT p, o
+ORDER BY {PRODUCT_ORDERS_SORT}
+LIMIT $limit
+RETURN p.product_id AS product_id, collect(o {ORDER_MAP}) AS orders
+""",
+    {"product_id": 1, "after_date": None, "after_id": None, "limit": 51},
+)
+
+PRODUCT_CUSTOMERS_PAGE = register(
+    "products.customers_page",
+    f"""
+MATCH (p:Product {{product_id: $product_id}})
+OPTIONAL MATCH (p)<-[:CONTAINS]-(:Order)<-[:PLACED]-(c:Customer)
+WHERE $after_id IS NULL OR c.customer_id > $after_id
+WITH DISTINCT p, c
+ORDER BY c.customer_id ASC
+LIMIT $limit
+RETURN p.product_id AS product_id, collect(c {CUSTOMER_MAP}) AS customers
+""",
+    {"product_id": 1, "after_id": None, "limit": 51},
+)
+
+# unordered: nothing to sort, so rows reach the client as soon as they are matched
+PRODUCT_ORDERS_STREAM = register(
+    "products.orders_stream",
+    f"""
+MATCH (:Product {{product_id: $product_id}})<-[:CONTAINS]-(o:Order)
+RETURN DISTINCT o {ORDER_MAP} AS order
+""",
+    {"product_id": 1},
+)
+
+PRODUCT_CUSTOMERS_STREAM = register(
+    "products.customers_stream",
+    f"""
+MATCH (:Product {{product_id: $product_id}})<-[:CONTAINS]-(:Order)<-[:PLACED]-(c:Customer)
+RETURN DISTINCT c {CUSTOMER_MAP} AS customer
+""",
+    {"product_id": 1},
+)
+
+
+# ----------------------------
+# Analytics
+# ----------------------------
+# counters materialized on Product by scripts/seed_data.py (refresh_product_counters),
+# read in index order (product_times_ordered_index): no aggregation, no sort
+TOP_PRODUCTS = register(
+    "analytics.top_products",
+    """
+MATCH (p:Product)
+WHERE p.times_ordered IS NOT NULL
+WITH p
+ORDER BY p.times_ordered DESC
+LIMIT $limit
+RETURN
+  p.product_id AS product_id,
+  p.name AS name,
+  p.times_ordered AS times_ordered,
+  coalesce(p.total_quantity, 0) AS total_quantity
+""",
+    {"limit": 10},
+)
+
+# live aggregation over every CONTAINS relationship (?fresh=true)
+TOP_PRODUCTS_LIVE = register(
+    "analytics.top_products_live",
+    """
+MATCH (:Order)-[r:CONTAINS]->(p:Product)
+RETURN
+  p.product_id AS product_id,
+  p.name AS name,
+  count(*) AS times_ordered,
+  coalesce(sum(r.quantity), 0) AS total_quantity
+ORDER BY times_ordered DESC
+LIMIT $limit
+""",
+    {"limit": 10},
+)
+
+# Late deliveries per department: one streaming count per department (no collect()).
+# Each variant leads with the equality predicates of the filters that are set, so
+# the planner can seek the matching index:
+#   region + shipping -> order_region_shipping_index (composite)
+#   region            -> order_region_index
+#   dates, no region  -> order_date_index (range seek; both bounds are sent)
+#   nothing           -> every order (label scan)
+# No USING INDEX hints: on a database without the indexes (not seeded yet) a hint
+# is a planning error and startup warm-up would fail; tests/api asserts the seeks.
+# market / shipping_mode / date filters are optional ($x IS NULL = no filter);
+# dates are inclusive ISO days.
+ORDER_DATE_FROM = "o.order_date >= datetime({date: date($date_from), timezone: 'UTC'})"
+ORDER_DATE_TO = "o.order_date < datetime({date: date($date_to), timezone: 'UTC'}) + duration('P1D')"
+
+
+def _late_deliveries(*seek: str, date_range: bool = False) -> str:
+    # date_range: the date bounds are part of the seek instead of optional filters
+    dates = [ORDER_DATE_FROM, ORDER_DATE_TO] if date_range else [
+        f"($date_from IS NULL OR {ORDER_DATE_FROM})",
+        f"($date_to IS NULL OR {ORDER_DATE_TO})",
+    ]
+    predicates = [*seek, *dates, "($shipping_mode IS NULL OR o.shipping_mode = $shipping_mode)"]
+    where = "\n  AND ".join(predicates)
+    return f"""
+MATCH (o:Order)
+WHERE {where}
+MATCH (o)-[:FROM_DEPARTMENT]->(d:Department)
+WHERE $market IS NULL OR d.market = $market
+WITH
+  d,
+  count(o) AS total_orders,
+  count(CASE WHEN o.late_delivery_risk = 1 THEN 1 END) AS late_orders
+RETURN
+  d.department_id AS department_id,
+  d.name AS department_name,
+  d.market AS market,
+  late_orders,
+  total_orders,
+  100.0 * late_orders / total_orders AS late_ratio
+ORDER BY late_ratio DESC, late_orders DESC
+LIMIT $limit
+"""
+
+
+LATE_DELIVERY_FILTERS = {"market": None, "shipping_mode": None, "date_from": None, "date_to": None, "limit": 10}
+
+LATE_DELIVERIES_BY_DEPARTMENT = register(
+    "analytics.late_deliveries_by_department",
+    _late_deliveries(),
+    LATE_DELIVERY_FILTERS,
+)
+
+LATE_DELIVERIES_BY_DEPARTMENT_DATES = register(
+    "analytics.late_deliveries_by_department_dates",
+    _late_deliveries(date_range=True),
+    {**LATE_DELIVERY_FILTERS, "date_from": "2017-01-01", "date_to": "2017-12-31"},
+)
+
+LATE_DELIVERIES_BY_DEPARTMENT_REGION = register(
+    "analytics.late_deliveries_by_department_region",
+    _late_deliveries("o.region = $region"),
+    {**LATE_DELIVERY_FILTERS, "region": "Western Europe"},
+)
+
+LATE_DELIVERIES_BY_DEPARTMENT_REGION_SHIPPING = register(
+    "analytics.late_deliveries_by_department_region_shipping",
+    _late_deliveries("o.region = $region", "o.shipping_mode = $shipping_mode"),
+    {**LATE_DELIVERY_FILTERS, "region": "Western Europe", "shipping_mode": "Standard Class"},
+)
+
+# Late ratio and average shipping delay (real - scheduled days) per day / week / month,
+# over a range seek on order_date_index (picked by the planner, no hint: see above).
+# $bucket is the datetime.truncate() unit.
+LATE_DELIVERIES_SERIES = register(
+    "analytics.late_deliveries_series",
+    """
+MATCH (o:Order)
+WHERE o.order_date >= datetime({date: date($date_from), timezone: 'UTC'})
+  AND o.order_date < datetime({date: date($date_to), timezone: 'UTC'}) + duration('P1D')
+WITH
+  date(datetime.truncate($bucket, o.order_date)) AS bucket,
+  o
+WITH
+  bucket,
+  count(o) AS total_orders,
+  count(CASE WHEN o.late_delivery_risk = 1 THEN 1 END) AS late_orders,
+  avg(o.days_shipping_real - o.days_shipping_scheduled) AS avg_shipping_delay_days
+RETURN
+  toString(bucket) AS bucket,
+  total_orders,
+  late_orders,
+  100.0 * late_orders / total_orders AS late_ratio,
+  avg_shipping_delay_days
+ORDER BY bucket
+""",
+    {"date_from": "2017-01-01", "date_to": "2017-12-31", "bucket": "week"},
+)
+
+SHORTEST_PRODUCT_PATH = register(
+    "analytics.shortest_product_path",
+    """
+MATCH (start:Product {product_id: $from_id}),
+      (end:Product   {product_id: $to_id})
+MATCH p = shortestPath(
+    (start)-[:CO_PURCHASED_WITH*1..5]-(end)
+)
+RETURN
+  [n IN nodes(p) | {product_id: n.product_id, name: n.name}] AS products,
+  length(p) AS length
+""",
+    {"from_id": 1, "to_id": 2},
+)
+
+ALL_SHORTEST_PRODUCT_PATHS = register(
+    "analytics.all_shortest_product_paths",
+    """
+MATCH (start:Product {product_id: $from_id}),
+      (end:Product   {product_id: $to_id})
+MATCH p = allShortestPaths(
+    (start)-[:CO_PURCHASED_WITH*1..5]-(end)
+)
+RETURN
+  [n IN nodes(p) | {product_id: n.product_id, name: n.name}] AS products,
+  length(p) AS length
+ORDER BY length ASC
+""",
+    {"from_id": 1, "to_id": 2},
+)
+
+
+# ----------------------------
+# Co-purchase graph snapshot (app/services/copurchase_graph.py): every product
+# and CO_PURCHASED_WITH edge, loaded into CSR arrays for in-process path queries
+# ----------------------------
+COPURCHASE_PRODUCTS = register(
+    "copurchase.products",
+    """
+MATCH (p:Product)
+RETURN p.product_id AS product_id, p.name AS name
+""",
+)
+
+COPURCHASE_EDGES = register(
+    "copurchase.edges",
+    """
+MATCH (a:Product)-[r:CO_PURCHASED_WITH]->(b:Product)
+RETURN a.product_id AS a, b.product_id AS b, coalesce(r.weight, 1) AS weight
+""",
+)
+
+
+# ----------------------------
+# GDS (plugin optional: the endpoints fall back to plain Cypher)
+# ----------------------------
+GDS_GRAPH_EXISTS = register(
+    "gds.graph_exists",
+    """
+CALL gds.graph.exists($name) YIELD exists
+RETURN exists
+""",
+    {"name": "productCopurchase"},
+    optional=True,
+)
+
+GDS_GRAPH_PROJECT = register(
+    "gds.graph_project",
+    """
+CALL gds.graph.project(
+  $name,
+  'Product',
+  {
+    CO_PURCHASED_WITH: {
+      orientation: 'UNDIRECTED',
+      properties: 'weight'
+    }
+  }
+)
+""",
+    {"name": "productCopurchase"},
+    optional=True,
+)
+
+PAGERANK_STREAM = register(
+    "gds.pagerank_stream",
+    """
+CALL gds.pageRank.stream($graph, { relationshipWeightProperty: 'weight' })
+YIELD nodeId, score
+WITH gds.util.asNode(nodeId) AS p, score
+RETURN p.product_id AS product_id, p.name AS name, score
+ORDER BY score DESC
+LIMIT $limit
+""",
+    {"graph": "productCopurchase", "limit": 10},
+    optional=True,
+)
+
+# GDS plugin unavailable (or graph creation failed) - fall back to a simple
+# degree-based score so the endpoint still returns a meaningful response.
+PAGERANK_FALLBACK = register(
+    "gds.pagerank_fallback",
+    """
+MATCH (p:Product)-[r:CO_PURCHASED_WITH]-()
+WITH p, coalesce(sum(r.weight), 0) AS score
+RETURN p.product_id AS product_id, p.name AS name, score
+ORDER BY score DESC
+LIMIT $limit
+""",
+    {"limit": 10},
+)
+
+LOUVAIN_STREAM = register(
+    "gds.louvain_stream",
+    """
+CALL gds.louvain.stream($graph, { relationshipWeightProperty: 'weight' })
+YIELD nodeId, communityId
+WITH gds.util.asNode(nodeId) AS p, communityId
+RETURN p.product_id AS product_id, p.name AS name, communityId AS community_id
+ORDER BY community_id ASC, product_id ASC
+LIMIT $limit
+""",
+    {"graph": "productCopurchase", "limit": 20},
+    optional=True,
+)
+
+# weighted paths need a cost per relationship, which a native projection cannot
+# derive from r.weight: Cypher aggregation projection with one property per
+# path cost (app/services/copurchase_graph.PATH_COSTS). Every Product is projected,
+# isolated ones too, so Dijkstra from or to one finds no path instead of failing.
+GDS_COST_GRAPH_PROJECT = register(
+    "gds.cost_graph_project",
+    """
+MATCH ()-[w:CO_PURCHASED_WITH]->()
+WITH max(w.weight) AS top
+MATCH (a:Product)
+OPTIONAL MATCH (a)-[r:CO_PURCHASED_WITH]->(b:Product)
+WHERE r.weight > 0
+WITH gds.graph.project(
+  $name, a, b,
+  {relationshipProperties: CASE WHEN r IS NULL THEN null
+                                ELSE {inverse: 1.0 / r.weight, neglog: -log(toFloat(r.weight) / top)} END},
+  {undirectedRelationshipTypes: ['*']}
+) AS g
+RETURN g.graphName AS graph
+""",
+    {"name": "productCopurchaseCost-v1"},
+    optional=True,
+)
+
+# cost projections of earlier graph versions ($prefix + version), dropped once a
+# newer one exists
+GDS_DROP_STALE_GRAPHS = register(
+    "gds.drop_stale_graphs",
+    """
+CALL gds.graph.list() YIELD graphName
+WITH graphName WHERE graphName STARTS WITH $prefix AND graphName <> $name
+CALL gds.graph.drop(graphName, false) YIELD graphName AS dropped
+RETURN collect(dropped) AS dropped
+""",
+    {"prefix": "productCopurchaseCost-", "name": "productCopurchaseCost-v1"},
+    optional=True,
+)
+
+WEIGHTED_PATH_DIJKSTRA = register(
+    "gds.weighted_path_dijkstra",
+    """
+MATCH (source:Product {product_id: $from_id}), (target:Product {product_id: $to_id})
+CALL gds.shortestPath.dijkstra.stream($graph, {
+  sourceNode: source,
+  targetNode: target,
+  relationshipWeightProperty: $cost
+})
+YIELD totalCost, nodeIds
+RETURN [nodeId IN nodeIds | gds.util.asNode(nodeId) {.product_id, .name}] AS products,
+       size(nodeIds) - 1 AS length,
+       totalCost AS total_cost
+""",
+    {"graph": "productCopurchaseCost-v1", "from_id": 1, "to_id": 2, "cost": "inverse"},
+    optional=True,
+)
+
+# No GDS plugin available - return deterministic buckets by product id
+# so the endpoint remains stable for callers.
+LOUVAIN_FALLBACK = register(
+    "gds.louvain_fallback",
+    """
+MATCH (p:Product)
+WITH p, toInteger(p.product_id) AS community_id
+RETURN p.product_id AS product_id, p.name AS name, community_id
+ORDER BY community_id ASC, product_id ASC
+LIMIT $limit
+""",
+    {"limit": 20},
+)
+
+
+# ----------------------------
+# ML link prediction
+# ----------------------------
+ML_CANDIDATES = register(
+    "ml.candidates",
+    """
+MATCH (p:Product {product_id: $pid})-[:CO_PURCHASED_WITH]-(n:Product)-[:CO_PURCHASED_WITH]-(c:Product)
+WHERE c.product_id <> $pid
+RETURN DISTINCT c.product_id AS cid, c.name AS name
+LIMIT 2000
+""",
+    {"pid": 1},
+)
+
+ML_PAIR_FEATURES = register(
+    "ml.pair_features",
+    """
+UNWIND $pairs AS pair
+MATCH (p:Product {product_id: pair.p}), (q:Product {product_id: pair.q})
+WITH p, q
+// degrees in co-purchase graph
+OPTIONAL MATCH (p)-[:CO_PURCHASED_WITH]-(pn:Product)
+WITH p, q, count(pn) AS deg_p
+OPTIONAL MATCH (q)-[:CO_PURCHASED_WITH]-(qn:Product)
+WITH p, q, deg_p, count(qn) AS deg_q
+// common neighbors
+OPTIONAL MATCH (p)-[:CO_PURCHASED_WITH]-(x:Product)-[:CO_PURCHASED_WITH]-(q)
+WITH p, q, deg_p, deg_q, count(DISTINCT x) AS common
+WITH
+  p.product_id AS p_id,
+  q.product_id AS q_id,
+  deg_p,
+  deg_q,
+  common,
+  (deg_p * deg_q) AS pref_attach,
+  CASE WHEN (deg_p + deg_q - common) = 0 THEN 0.0
+       ELSE (1.0 * common) / (deg_p + deg_q - common) END AS jaccard
+RETURN p_id, q_id, deg_p, deg_q, common, pref_attach, jaccard
+""",
+    {"pairs": [{"p": 1, "q": 2}]},
+)
+
+ML_POSITIVE_PAIRS = register(
+    "ml.positive_pairs",
+    """
+MATCH (p:Product)-[:CO_PURCHASED_WITH]-(q:Product)
+WHERE p.product_id < q.product_id
+RETURN p.product_id AS p, q.product_id AS q
+LIMIT $n
+""",
+    {"n": 10},
+)
+
+# random pairs without an edge; keep it limited to avoid huge cartesian work
+ML_NEGATIVE_PAIRS = register(
+    "ml.negative_pairs",
+    """
+MATCH (p:Product)
+WITH p ORDER BY rand() LIMIT $n
+MATCH (q:Product)
+WITH p, q ORDER BY rand() LIMIT $n
+WHERE p.product_id <> q.product_id AND p.product_id < q.product_id
+AND NOT (p)-[:CO_PURCHASED_WITH]-(q)
+RETURN p.product_id AS p, q.product_id AS q
+LIMIT $n
+""",
+    {"n": 10},
+)
+
+
+# ----------------------------
+# LLM templates (safe, deterministic)
+# ----------------------------
+
+# 1-hop: products directly co-purchased with product_id
+LLM_COPURCHASE = register(
+    "llm.copurchase",
+    """
+MATCH (p1:Product {product_id: $product_id})-[r:CO_PURCHASED_WITH]-(p2:Product)
+RETURN p2.product_id AS product_id, p2.name AS name, r.weight AS weight
+ORDER BY weight DESC
+LIMIT $limit
+""",
+    {"product_id": 1, "limit": 10},
+)
+
+# 2-hop recommendations: "people who bought X also bought Y" via shared neighbor
+LLM_RECOMMEND_2HOP = register(
+    "llm.recommend_2hop",
+    """
+MATCH (p:Product {product_id: $product_id})-[r1:CO_PURCHASED_WITH]-(mid:Product)-[r2:CO_PURCHASED_WITH]-(rec:Product)
+WHERE rec.product_id <> $product_id
+WITH rec, SUM(r1.weight + r2.weight) AS score
+RETURN rec.product_id AS product_id, rec.name AS name, score AS score
+ORDER BY score DESC
+LIMIT $limit
+""",
+    {"product_id": 1, "limit": 10},
+)
+
+# shortest path between two products (cap hops to keep it cheap)
+LLM_CONNECTION = register(
+    "llm.connection",
+    """
+MATCH (a:Product {product_id: $from_id}),
+      (b:Product {product_id: $to_id})
+MATCH p = shortestPath((a)-[:CO_PURCHASED_WITH*..4]-(b))
+RETURN [n IN nodes(p) | {product_id: n.product_id, name: n.name}] AS path,
+       length(p) AS length
+LIMIT 1
+""",
+    {"from_id": 1, "to_id": 2},
+)
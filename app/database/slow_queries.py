@@ -0,0 +1,118 @@
+"""
+Slow-query log: when a registered query takes longer than the threshold, it is
+re-run with PROFILE in a background task (sampled, at most once per query per
+interval) and the operator tree is kept in a ring buffer for /admin/slow-queries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+from .queries import NamedQuery
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+# fraction of slow executions that get profiled
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+# a given query is profiled at most once per interval (PROFILE runs the query again)
+SLOW_QUERY_MIN_INTERVAL = float(os.getenv("SLOW_QUERY_MIN_INTERVAL", "60"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "50"))
+
+MAX_PARAMS_CHARS = 500
+
+
+def flatten_plan(plan: dict, depth: int = 0) -> List[dict]:
+    """Operator tree of a PROFILE summary -> list of operators, depth-first."""
+    args = plan.get("args") or {}
+    operators = [
+        {
+            "operator": plan.get("operatorType"),
+            "depth": depth,
+            "db_hits": plan.get("dbHits", 0),
+            "rows": plan.get("rows", 0),
+            "details": args.get("Details"),
+        }
+    ]
+    for child in plan.get("children") or []:
+        operators.extend(flatten_plan(child, depth + 1))
+    return operators
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        session_factory: Callable,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        sample_rate: float = SLOW_QUERY_SAMPLE_RATE,
+        min_interval: float = SLOW_QUERY_MIN_INTERVAL,
+        size: int = SLOW_QUERY_BUFFER_SIZE,
+    ):
+        self._session_factory = session_factory
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.min_interval = min_interval
+        self._entries = deque(maxlen=size)
+        self._last_profiled: Dict[str, float] = {}
+        # strong references: the loop only keeps weak ones to running tasks
+        self._tasks = set()
+
+    def observe(self, query, params: dict, seconds: float) -> bool:
+        """Schedule a PROFILE of query if it was slow and passes sampling / rate limit."""
+        elapsed_ms = seconds * 1000
+        # only registered, side-effect free queries: optional (GDS) ones may project graphs
+        if not isinstance(query, NamedQuery) or query.optional or elapsed_ms < self.threshold_ms:
+            return False
+        now = time.monotonic()
+        last = self._last_profiled.get(query.name)
+        if last is not None and now - last < self.min_interval:
+            return False
+        if random.random() >= self.sample_rate:
+            return False
+        self._last_profiled[query.name] = now
+
+        task = asyncio.get_running_loop().create_task(self._profile(query, params, elapsed_ms))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _profile(self, query: NamedQuery, params: dict, elapsed_ms: float) -> None:
+        try:
+            async with self._session_factory() as session:
+                result = await session.run("PROFILE " + query.text, params)
+                summary = await result.consume()
+        except Exception as e:
+            logger.warning("PROFILE of slow query %s failed: %s", query.name, e)
+            return
+
+        plan = summary.profile or {}
+        operators = flatten_plan(plan) if plan else []
+        self._entries.append(
+            {
+                "query": query.name,
+                "observed_ms": round(elapsed_ms, 1),
+                "profiled_at": time.time(),
+                "params": repr(params)[:MAX_PARAMS_CHARS],
+                "total_db_hits": sum(op["db_hits"] for op in operators),
+                "operators": operators,
+                "plan": plan,
+            }
+        )
+        logger.warning(
+            "Slow query %s (%.0f ms) profiled: %d db hits", query.name, elapsed_ms, self._entries[-1]["total_db_hits"]
+        )
+
+    def entries(self) -> List[dict]:
+        """Profiled slow queries, newest first."""
+        return list(reversed(self._entries))
+
+    async def drain(self) -> None:
+        """Wait for in-flight PROFILE runs (tests, shutdown)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
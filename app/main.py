@@ -1,4 +1,9 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from starlette.concurrency import run_in_threadpool
 
 from app.routers.orders import router as orders_router
 from app.routers.products import router as products_router
@@ -6,16 +11,90 @@ from app.routers.analytics import router as analytics_router
 from app.routers import gds
 from app.routers.ml import router as ml_router
 from app.routers import llm
+from app.routers import admin
+
+from .metrics import HTTP_SECONDS, render_latest
+from .services.copurchase_graph import copurchase_engine
+from .database import (
+    NEO4J_WARMUP_CONNECTIONS,
+    NEO4J_WARMUP_QUERIES,
+    QueryWarmupError,
+    close_async_driver,
+    close_driver,
+    get_async_driver,
+    queries,
+    slow_query_log,
+    warm_up_async_pool,
+    warm_up_queries,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _connect_neo4j() -> None:
+    driver = get_async_driver()
+    await driver.verify_connectivity()
+    opened = await warm_up_async_pool(driver, NEO4J_WARMUP_CONNECTIONS)
+    logger.info("Neo4j connection pool warmed up with %d connections", opened)
+    if NEO4J_WARMUP_QUERIES:
+        report = await warm_up_queries(driver)
+        logger.info(
+            "Planned %d registered queries (%d skipped, %d warnings)",
+            len(report["planned"]), len(report["skipped"]), len(report["warnings"]),
+        )
+    # starts loading the co-purchase snapshot in the background (path endpoints use Cypher meanwhile)
+    await copurchase_engine.snapshot()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Create the driver and open connections before the first request;
+    # if Neo4j is not up yet, start anyway and let get_async_driver() connect lazily.
+    # A registered query that no longer plans is a deployment bug: refuse to start.
+    try:
+        await _connect_neo4j()
+    except QueryWarmupError:
+        raise
+    except Exception as e:
+        logger.warning("Neo4j not reachable at startup, connecting lazily: %s", e)
+    yield
+    # let background PROFILE runs and snapshot loads finish before their driver goes away
+    await slow_query_log.drain()
+    await copurchase_engine.drain()
+    await close_async_driver()
+    # the sync driver is only created by ML training; close it if it was
+    await run_in_threadpool(close_driver)
+
+
+app = FastAPI(title="Supply Chain Graph API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_http_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (/orders/{order_id}), not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        HTTP_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - t0)
 
-from .database import get_driver
 
-app = FastAPI(title="Supply Chain Graph API")
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/health")
-def health_check():
-    driver = get_driver()
-    with driver.session() as session:
-        result = session.run("RETURN 1 AS ok").single()
+async def health_check():
+    driver = get_async_driver()
+    async with driver.session() as session:
+        result = await (await session.run(queries.HEALTH.text)).single()
     return {"status": "ok", "neo4j": result["ok"]}
 
 @app.get("/")
@@ -32,3 +111,4 @@ app.include_router(analytics_router)
 app.include_router(gds.router)
 app.include_router(ml_router)
 app.include_router(llm.router)
+app.include_router(admin.router)
@@ -0,0 +1,87 @@
+"""
+Prometheus metrics for the API, served on GET /metrics.
+
+Per named query (app/database/queries.py): client latency, the server-side
+result_available_after / result_consumed_after from the result summary, row
+counts and errors. Per route: HTTP latency. Plus the Groq call, so a slow
+response can be attributed to Neo4j, the API itself or the LLM, and the
+entity cache (app/database/cache.py) hits, misses and evictions.
+"""
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+QUERY_SECONDS = Histogram(
+    "neo4j_query_seconds",
+    "Client-side latency of a named query (run + fetch of all records)",
+    ["query"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_AVAILABLE_AFTER = Histogram(
+    "neo4j_query_result_available_after_seconds",
+    "Server time until the first record was available (result summary)",
+    ["query"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_CONSUMED_AFTER = Histogram(
+    "neo4j_query_result_consumed_after_seconds",
+    "Server time until the last record was consumed (result summary)",
+    ["query"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_ROWS = Histogram(
+    "neo4j_query_rows",
+    "Records returned by a named query",
+    ["query"],
+    buckets=ROW_BUCKETS,
+)
+QUERY_ERRORS = Counter(
+    "neo4j_query_errors_total",
+    "Named queries that raised, by exception type",
+    ["query", "error"],
+)
+
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+GROQ_SECONDS = Histogram(
+    "groq_request_duration_seconds",
+    "Latency of the Groq interpretation call",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CACHE_HITS = Counter("entity_cache_hits_total", "Entity cache lookups served from the cache", ["entity"])
+CACHE_MISSES = Counter("entity_cache_misses_total", "Entity cache lookups that went to Neo4j", ["entity"])
+CACHE_EVICTIONS = Counter(
+    "entity_cache_evictions_total",
+    "Entries dropped by the in-process entity cache (size = LRU, expired = TTL, version = reseed)",
+    ["reason"],
+)
+
+
+def observe_query(name: str, seconds: float, rows: int, summary=None) -> None:
+    QUERY_SECONDS.labels(name).observe(seconds)
+    QUERY_ROWS.labels(name).observe(rows)
+    # the summary reports milliseconds; None when the server did not send it
+    available_after = getattr(summary, "result_available_after", None)
+    consumed_after = getattr(summary, "result_consumed_after", None)
+    if available_after is not None:
+        QUERY_AVAILABLE_AFTER.labels(name).observe(available_after / 1000)
+    if consumed_after is not None:
+        QUERY_CONSUMED_AFTER.labels(name).observe(consumed_after / 1000)
+
+
+def observe_query_error(name: str, error: BaseException) -> None:
+    QUERY_ERRORS.labels(name, type(error).__name__).inc()
+
+
+def render_latest():
+    """(body, content type) of the current metrics in Prometheus text format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
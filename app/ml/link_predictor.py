@@ -1,36 +1,17 @@
 import os
 import joblib
 import numpy as np
+from neo4j import READ_ACCESS
 from neo4j.exceptions import Neo4jError
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, accuracy_score
 
+from app.database import fetch_rows, queries
+
 MODEL_PATH = os.getenv("ML_MODEL_PATH", "/code/models/link_predictor.joblib")
 
-FEATURE_QUERY = """
-UNWIND $pairs AS pair
-MATCH (p:Product {product_id: pair.p}), (q:Product {product_id: pair.q})
-WITH p, q
-// degrees in co-purchase graph
-OPTIONAL MATCH (p)-[:CO_PURCHASED_WITH]-(pn:Product)
-WITH p, q, count(pn) AS deg_p
-OPTIONAL MATCH (q)-[:CO_PURCHASED_WITH]-(qn:Product)
-WITH p, q, deg_p, count(qn) AS deg_q
-// common neighbors
-OPTIONAL MATCH (p)-[:CO_PURCHASED_WITH]-(x:Product)-[:CO_PURCHASED_WITH]-(q)
-WITH p, q, deg_p, deg_q, count(DISTINCT x) AS common
-WITH
-  p.product_id AS p_id,
-  q.product_id AS q_id,
-  deg_p,
-  deg_q,
-  common,
-  (deg_p * deg_q) AS pref_attach,
-  CASE WHEN (deg_p + deg_q - common) = 0 THEN 0.0
-       ELSE (1.0 * common) / (deg_p + deg_q - common) END AS jaccard
-RETURN p_id, q_id, deg_p, deg_q, common, pref_attach, jaccard
-"""
+FEATURE_QUERY = queries.ML_PAIR_FEATURES.text
 
 def save_model(model):
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
@@ -42,49 +23,39 @@ def load_model():
     return joblib.load(MODEL_PATH)
 
 def sample_positive_pairs(session, n_pos: int):
-    rows = session.run(
-        """
-        MATCH (p:Product)-[:CO_PURCHASED_WITH]-(q:Product)
-        WHERE p.product_id < q.product_id
-        RETURN p.product_id AS p, q.product_id AS q
-        LIMIT $n
-        """,
-        n=n_pos,
-    ).data()
+    rows = session.run(queries.ML_POSITIVE_PAIRS.text, n=n_pos).data()
     return [{"p": r["p"], "q": r["q"]} for r in rows]
 
 def sample_negative_pairs(session, n_neg: int):
-    # random pairs without an edge; keep it limited to avoid huge cartesian work
-    rows = session.run(
-        """
-        MATCH (p:Product)
-        WITH p ORDER BY rand() LIMIT $n
-        MATCH (q:Product)
-        WITH p, q ORDER BY rand() LIMIT $n
-        WHERE p.product_id <> q.product_id AND p.product_id < q.product_id
-        AND NOT (p)-[:CO_PURCHASED_WITH]-(q)
-        RETURN p.product_id AS p, q.product_id AS q
-        LIMIT $n
-        """,
-        n=n_neg,
-    ).data()
+    rows = session.run(queries.ML_NEGATIVE_PAIRS.text, n=n_neg).data()
     return [{"p": r["p"], "q": r["q"]} for r in rows]
 
-def fetch_features(session, pairs):
-    rows = session.run(FEATURE_QUERY, pairs=pairs).data()
+def features_from_rows(rows):
     # X: deg_p, deg_q, common, pref_attach, jaccard
     X = np.array([[r["deg_p"], r["deg_q"], r["common"], r["pref_attach"], r["jaccard"]] for r in rows], dtype=float)
     ids = [(r["p_id"], r["q_id"]) for r in rows]
     return X, ids
 
+def fetch_features(session, pairs):
+    rows = session.run(FEATURE_QUERY, pairs=pairs).data()
+    return features_from_rows(rows)
+
+async def fetch_features_async(tx, pairs):
+    rows = await fetch_rows(tx, queries.ML_PAIR_FEATURES, {"pairs": pairs})
+    return features_from_rows(rows)
+
+def _training_features(tx, n_pos, n_neg):
+    pos = sample_positive_pairs(tx, n_pos)
+    neg = sample_negative_pairs(tx, n_neg)
+
+    X_pos, _ = fetch_features(tx, pos)
+    X_neg, _ = fetch_features(tx, neg)
+    return X_pos, X_neg
+
 def train_and_evaluate(driver, n_pos=5000, n_neg=5000, test_size=0.2, random_state=42):
     try:
-        with driver.session() as session:
-            pos = sample_positive_pairs(session, n_pos)
-            neg = sample_negative_pairs(session, n_neg)
-
-            X_pos, _ = fetch_features(session, pos)
-            X_neg, _ = fetch_features(session, neg)
+        with driver.session(default_access_mode=READ_ACCESS) as session:
+            X_pos, X_neg = session.execute_read(_training_features, n_pos, n_neg)
 
         y_pos = np.ones(len(X_pos))
         y_neg = np.zeros(len(X_neg))
@@ -28,6 +28,23 @@ class DepartmentBottleneck(BaseModel):
 class DepartmentBottlenecksResponse(BaseModel):
     items: List[DepartmentBottleneck]
 
+
+# -------- TIME SERIES: LATE DELIVERIES --------
+
+class LateDeliveryBucket(BaseModel):
+    bucket: str  # first day of the bucket (ISO date)
+    total_orders: int
+    late_orders: int
+    late_ratio: float  # percentage of late orders (0–100)
+    avg_shipping_delay_days: Optional[float]  # real - scheduled shipping days
+
+
+class LateDeliverySeriesResponse(BaseModel):
+    bucket: str  # day | week | month
+    date_from: str
+    date_to: str
+    items: List[LateDeliveryBucket]
+
 # Shortest paths algorithms
 
 class ProductInPath(BaseModel):
@@ -46,3 +63,13 @@ class ProductPathResponse(BaseModel):
 
 class AllProductPathsResponse(BaseModel):
     paths: List[ProductPath]
+
+
+class WeightedProductPath(ProductPath):
+    total_cost: float  # sum of the edge costs along the path
+
+
+class WeightedProductPathResponse(BaseModel):
+    cost: str  # inverse | neglog
+    engine: str  # gds | in-process
+    path: WeightedProductPath
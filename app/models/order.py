@@ -1,37 +1,40 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Optional, List, Union
+from pydantic import BaseModel, Field
+
+# upper bound on ids per POST /orders/batch or /products/batch request
+MAX_BATCH_IDS = 5000
 
 
 class CustomerModel(BaseModel):
-    customer_id: Optional[int]
-    first_name: Optional[str]
-    last_name: Optional[str]
-    city: Optional[str]
-    country: Optional[str]
+    customer_id: Optional[int] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
 
 
 class ProductModel(BaseModel):
-    product_id: Optional[int]
-    name: Optional[str]
-    price: Optional[float]
+    product_id: Optional[int] = None
+    name: Optional[str] = None
+    price: Optional[float] = None
 
 
 class OrderCore(BaseModel):
     order_id: int
-    order_date: Optional[str]
-    shipping_date: Optional[str]
-    late_delivery_risk: Optional[int]
-    shipping_mode: Optional[str]
-    days_shipping_scheduled: Optional[int]
-    days_shipping_real: Optional[int]
-    region: Optional[str]
-    delivery_status: Optional[str]
-    status: Optional[str]
+    order_date: Optional[str] = None
+    shipping_date: Optional[str] = None
+    late_delivery_risk: Optional[int] = None
+    shipping_mode: Optional[str] = None
+    days_shipping_scheduled: Optional[int] = None
+    days_shipping_real: Optional[int] = None
+    region: Optional[str] = None
+    delivery_status: Optional[str] = None
+    status: Optional[str] = None
 
 
 class OrderResponse(BaseModel):
     order: OrderCore
-    customer: Optional[CustomerModel]
+    customer: Optional[CustomerModel] = None
     products: List[ProductModel]
 
 
@@ -39,5 +42,49 @@ class OrderResponse(BaseModel):
 
 class ProductDetailsResponse(BaseModel):
     product: ProductModel
+    # the first page of each; the next_cursor continues on /orders and /customers
     orders: List[OrderCore]
     customers: List[CustomerModel]
+    orders_next_cursor: Optional[str] = None
+    customers_next_cursor: Optional[str] = None
+
+
+# keyset pages of /products/{product_id}/orders and /customers
+
+class ProductOrdersPage(BaseModel):
+    product_id: Union[int, str]
+    items: List[OrderCore]
+    next_cursor: Optional[str] = None
+
+
+class ProductCustomersPage(BaseModel):
+    product_id: Union[int, str]
+    items: List[CustomerModel]
+    next_cursor: Optional[str] = None
+
+
+# batch lookups: POST /orders/batch, POST /products/batch
+# items come back in request order; ids that do not exist have found=false
+
+class BatchLookupRequest(BaseModel):
+    ids: List[Union[int, str]] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class OrderBatchItem(BaseModel):
+    id: Union[int, str]
+    found: bool
+    result: Optional[OrderResponse] = None
+
+
+class OrderBatchResponse(BaseModel):
+    items: List[OrderBatchItem]
+
+
+class ProductBatchItem(BaseModel):
+    id: Union[int, str]
+    found: bool
+    result: Optional[ProductDetailsResponse] = None
+
+
+class ProductBatchResponse(BaseModel):
+    items: List[ProductBatchItem]
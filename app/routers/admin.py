@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from pydantic import BaseModel
+
+from app.database import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# when set, /admin/* requires the X-Admin-Token header
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+# -------------------------
+# Response models (Pydantic)
+# -------------------------
+
+class PlanOperator(BaseModel):
+    operator: Optional[str] = None
+    depth: int
+    db_hits: int
+    rows: int
+    details: Optional[str] = None
+
+
+class SlowQuery(BaseModel):
+    query: str
+    observed_ms: float
+    profiled_at: float
+    params: str
+    total_db_hits: int
+    operators: List[PlanOperator]
+    plan: dict
+
+
+class SlowQueriesResponse(BaseModel):
+    threshold_ms: float
+    sample_rate: float
+    min_interval_s: float
+    entries: List[SlowQuery]
+
+
+# -------------------------
+# Endpoints
+# -------------------------
+
+@router.get("/slow-queries", response_model=SlowQueriesResponse)
+def slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    query: Optional[str] = Query(None, description="Only this registered query name"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Latest slow queries, newest first, with the PROFILE plan captured in the background
+    (operator tree, db hits and rows per operator).
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    entries = slow_query_log.entries()
+    if query:
+        entries = [e for e in entries if e["query"] == query]
+
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "sample_rate": slow_query_log.sample_rate,
+        "min_interval_s": slow_query_log.min_interval,
+        "entries": entries[:limit],
+    }
@@ -1,61 +1,58 @@
-from typing import List
-
-from fastapi import APIRouter, Query, HTTPException
-from app.database import get_driver
+import asyncio
+import time
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, HTTPException
+from app.database import get_async_driver, queries, read_rows, read_single
+from app.services.copurchase_graph import (
+    WEIGHTED_PATH_BUDGET_MS,
+    WEIGHTED_PATH_MAX_BUDGET_MS,
+    PathBudgetExceeded,
+    copurchase_engine,
+)
+from app.services.gds_service import GdsUnavailable, run_weighted_path
+from app.services.http_cache import conditional_get
 from app.models.analytics import (
-    TopProduct,
     TopProductsResponse,
-    DepartmentBottleneck,
     DepartmentBottlenecksResponse,
+    LateDeliverySeriesResponse,
     ProductPathResponse,
     AllProductPathsResponse,
+    WeightedProductPathResponse,
 )
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
-@router.get("/top-products", response_model=TopProductsResponse)
-def get_top_products(limit: int = Query(10, ge=1, le=100)):
+@router.get("/top-products", response_model=TopProductsResponse, dependencies=[Depends(conditional_get())])
+async def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    fresh: bool = Query(False, description="Aggregate the CONTAINS relationships now instead of reading the counters"),
+):
     """
     Return the top N products, ordered by how many times they appear in orders.
-    """
-    driver = get_driver()
-
-    with driver.session() as session:
-        result = session.run(
-            """
-            MATCH (:Order)-[r:CONTAINS]->(p:Product)
-            RETURN
-              p.product_id AS product_id,
-              p.name AS name,
-              count(*) AS times_ordered,
-              coalesce(sum(r.quantity), 0) AS total_quantity
-            ORDER BY times_ordered DESC
-            LIMIT $limit
-            """,
-            limit=limit,
-        )
 
-        items: List[TopProduct] = []
-        for record in result:
-            items.append(
-                TopProduct(
-                    product_id=record["product_id"],
-                    name=record["name"],
-                    times_ordered=record["times_ordered"],
-                    total_quantity=record["total_quantity"],
-                )
-            )
+    Reads the times_ordered / total_quantity counters the seeder keeps on Product
+    through their index; fresh=true runs the full aggregation instead.
+    """
+    rows = await read_rows(queries.TOP_PRODUCTS_LIVE if fresh else queries.TOP_PRODUCTS, limit=limit)
 
-    return TopProductsResponse(items=items)
+    # rows already have the TopProduct fields: validated and serialized once by response_model
+    return {"items": rows}
 
 
 @router.get(
     "/bottlenecks/late-deliveries-by-department",
     response_model=DepartmentBottlenecksResponse,
 )
-def get_late_deliveries_by_department(
+async def get_late_deliveries_by_department(
     limit: int = Query(10, ge=1, le=100),
+    market: Optional[str] = Query(None, description="Department market, e.g. Europe"),
+    region: Optional[str] = Query(None, description="Order region, e.g. Western Europe"),
+    shipping_mode: Optional[str] = Query(None, description="e.g. Standard Class"),
+    date_from: Optional[date] = Query(None, description="First order day (inclusive)"),
+    date_to: Optional[date] = Query(None, description="Last order day (inclusive)"),
 ):
     """
     Find departments that are bottlenecks based on late deliveries.
@@ -64,58 +61,62 @@ def get_late_deliveries_by_department(
     - total_orders: how many orders went through this department
     - late_orders: how many of those had late_delivery_risk = 1
     - late_ratio: percentage of late orders (0–100)
+
+    Only orders matching the optional filters are counted.
     """
-    driver = get_driver()
-
-    with driver.session() as session:
-        result = session.run(
-            """
-            // Get all orders per department
-            MATCH (d:Department)<-[:FROM_DEPARTMENT]-(o:Order)
-            WITH d, collect(o) AS orders
-
-            // Compute late vs total
-            WITH
-              d,
-              orders,
-              [o IN orders WHERE o.late_delivery_risk = 1] AS late_orders_list,
-              size(orders) AS total_orders
-            WITH
-              d,
-              size(late_orders_list) AS late_orders,
-              total_orders,
-              CASE
-                WHEN total_orders = 0 THEN 0.0
-                ELSE 100.0 * size(late_orders_list) / total_orders
-              END AS late_ratio
-
-            RETURN
-              d.department_id AS department_id,
-              d.name AS department_name,
-              d.market AS market,
-              late_orders,
-              total_orders,
-              late_ratio
-            ORDER BY late_ratio DESC, late_orders DESC
-            LIMIT $limit
-            """,
-            limit=limit,
-        )
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from is after date_to")
+
+    # the variant whose index covers the most selective filters
+    if region and shipping_mode:
+        query = queries.LATE_DELIVERIES_BY_DEPARTMENT_REGION_SHIPPING
+    elif region:
+        query = queries.LATE_DELIVERIES_BY_DEPARTMENT_REGION
+    elif date_from or date_to:
+        # range seek on order_date_index: an open end becomes the widest bound
+        query = queries.LATE_DELIVERIES_BY_DEPARTMENT_DATES
+        date_from, date_to = date_from or date.min, date_to or date.max
+    else:
+        query = queries.LATE_DELIVERIES_BY_DEPARTMENT
+
+    rows = await read_rows(
+        query,
+        limit=limit,
+        market=market,
+        region=region,
+        shipping_mode=shipping_mode,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+    )
+
+    return {"items": rows}
 
-        items: List[DepartmentBottleneck] = []
-        for record in result:
-            items.append(
-                DepartmentBottleneck(
-                    department_id=record["department_id"],
-                    department_name=record["department_name"],
-                    market=record["market"],
-                    late_orders=record["late_orders"],
-                    total_orders=record["total_orders"],
-                    late_ratio=record["late_ratio"],
-                )
-            )
 
-    return DepartmentBottlenecksResponse(items=items)
+@router.get(
+    "/timeseries/late-deliveries",
+    response_model=LateDeliverySeriesResponse,
+)
+async def get_late_deliveries_series(
+    date_from: date = Query(..., description="First order day (inclusive)"),
+    date_to: date = Query(..., description="Last order day (inclusive)"),
+    bucket: Literal["day", "week", "month"] = Query("week"),
+):
+    """
+    Late ratio and average shipping delay (real - scheduled days) per time bucket,
+    for the orders placed between date_from and date_to. Weeks start on Monday;
+    empty buckets are omitted.
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from is after date_to")
+
+    rows = await read_rows(
+        queries.LATE_DELIVERIES_SERIES,
+        date_from=date_from.isoformat(),
+        date_to=date_to.isoformat(),
+        bucket=bucket,
+    )
+
+    return {"bucket": bucket, "date_from": date_from.isoformat(), "date_to": date_to.isoformat(), "items": rows}
 
 
 # Shortest path endpoints
@@ -125,31 +126,23 @@ def get_late_deliveries_by_department(
     "/paths/products/shortest",
     response_model=ProductPathResponse,
 )
-def shortest_product_path(
+async def shortest_product_path(
     from_id: int = Query(..., description="Source product_id"),
     to_id: int = Query(..., description="Target product_id"),
 ):
     """
     Find ONE shortest co-purchase path between two products
     using the CO_PURCHASED_WITH relationships.
+
+    Answered from the in-memory co-purchase snapshot when it is current,
+    else by shortestPath() in Neo4j.
     """
-    driver = get_driver()
-
-    with driver.session() as session:
-        record = session.run(
-            """
-            MATCH (start:Product {product_id: $from_id}),
-                  (end:Product   {product_id: $to_id})
-            MATCH p = shortestPath(
-                (start)-[:CO_PURCHASED_WITH*1..5]-(end)
-            )
-            RETURN
-              [n IN nodes(p) | {product_id: n.product_id, name: n.name}] AS products,
-              length(p) AS length
-            """,
-            from_id=from_id,
-            to_id=to_id,
-        ).single()
+    graph = await copurchase_engine.snapshot()
+    if graph is not None:
+        path = graph.shortest_path(from_id, to_id)
+        record = graph.describe(path) if path is not None else None
+    else:
+        record = await read_single(queries.SHORTEST_PRODUCT_PATH, from_id=from_id, to_id=to_id)
 
     if record is None:
         raise HTTPException(
@@ -157,60 +150,92 @@ def shortest_product_path(
             detail="No path found between these products",
         )
 
-    products = record["products"]
-    length = record["length"]
-
-    return {
-        "path": {
-            "products": products,
-            "length": length,
-        }
-    }
+    return {"path": record}
 
 
 @router.get(
     "/paths/products/all-shortest",
     response_model=AllProductPathsResponse,
 )
-def all_shortest_product_paths(
+async def all_shortest_product_paths(
     from_id: int = Query(..., description="Source product_id"),
     to_id: int = Query(..., description="Target product_id"),
 ):
     """
-    Find ALL shortest co-purchase paths between two products.
+    Find ALL shortest co-purchase paths between two products
+    (in-memory snapshot when current, else allShortestPaths() in Neo4j).
     """
-    driver = get_driver()
-
-    with driver.session() as session:
-        result = session.run(
-            """
-            MATCH (start:Product {product_id: $from_id}),
-                  (end:Product   {product_id: $to_id})
-            MATCH p = allShortestPaths(
-                (start)-[:CO_PURCHASED_WITH*1..5]-(end)
-            )
-            RETURN
-              [n IN nodes(p) | {product_id: n.product_id, name: n.name}] AS products,
-              length(p) AS length
-            ORDER BY length ASC
-            """,
-            from_id=from_id,
-            to_id=to_id,
+    graph = await copurchase_engine.snapshot()
+    if graph is not None:
+        rows = [graph.describe(path) for path in graph.all_shortest_paths(from_id, to_id)]
+    else:
+        rows = await read_rows(queries.ALL_SHORTEST_PRODUCT_PATHS, from_id=from_id, to_id=to_id)
+
+    if not rows:
+        raise HTTPException(
+            status_code=404,
+            detail="No paths found between these products",
         )
 
-        paths: List[dict] = []
-        for record in result:
-            paths.append(
-                {
-                    "products": record["products"],
-                    "length": record["length"],
-                }
-            )
+    return {"paths": rows}
+
 
-    if not paths:
+@router.get(
+    "/paths/products/weighted",
+    response_model=WeightedProductPathResponse,
+)
+async def weighted_product_path(
+    from_id: int = Query(..., description="Source product_id"),
+    to_id: int = Query(..., description="Target product_id"),
+    cost: Literal["inverse", "neglog"] = Query(
+        "inverse", description="Edge cost from the co-purchase weight w: 1/w or -log(w / max w)"
+    ),
+    budget_ms: int = Query(
+        WEIGHTED_PATH_BUDGET_MS,
+        ge=10,
+        le=WEIGHTED_PATH_MAX_BUDGET_MS,
+        description="Latency budget of the search; 504 when it runs out",
+    ),
+):
+    """
+    Find the cheapest co-purchase path between two products, where strongly
+    co-purchased pairs (high CO_PURCHASED_WITH weight) are cheap to cross.
+
+    Runs GDS Dijkstra when the plugin is installed (the budget is its transaction
+    timeout), else Dijkstra over the in-memory co-purchase snapshot (bounded by
+    expansions and the budget) in a worker thread, so the event loop keeps serving
+    other requests meanwhile.
+    """
+    deadline = time.monotonic() + budget_ms / 1000
+    try:
+        try:
+            record = await run_weighted_path(get_async_driver(), from_id, to_id, cost=cost, budget=budget_ms / 1000)
+            engine = "gds"
+        except GdsUnavailable as e:
+            if not copurchase_engine.enabled:
+                # permanent for this deployment: nothing to retry
+                raise HTTPException(
+                    status_code=501,
+                    detail="GDS is not available and the in-process co-purchase engine is disabled",
+                ) from e
+            graph = await copurchase_engine.snapshot()
+            if graph is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="GDS is not available and the co-purchase snapshot is not loaded yet",
+                    headers={"Retry-After": "1"},
+                ) from e
+            # CPU-bound: off the event loop; the deadline ends the thread's search too
+            found = await asyncio.to_thread(graph.weighted_path, from_id, to_id, cost=cost, deadline=deadline)
+            record = {**graph.describe(found[0]), "total_cost": found[1]} if found else None
+            engine = "in-process"
+    except PathBudgetExceeded as e:
+        raise HTTPException(status_code=504, detail=f"No weighted path within budget: {e}") from e
+
+    if record is None:
         raise HTTPException(
             status_code=404,
-            detail="No paths found between these products",
+            detail="No path found between these products",
         )
 
-    return {"paths": paths}
+    return {"cost": cost, "engine": engine, "path": record}
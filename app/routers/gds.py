@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 
 from pydantic import BaseModel, Field
 
-from app.database import get_driver
+from app.database import get_async_driver
+from app.services.http_cache import conditional_get
 from app.services.gds_service import (
     DEFAULT_GRAPH_NAME,
     run_louvain,
@@ -48,13 +49,14 @@ class LouvainResponse(BaseModel):
 # Endpoints
 # -------------------------
 
-@router.get("/pagerank", response_model=PageRankResponse)
-def pagerank(limit: int = Query(10, ge=1, le=200)):
-    driver = get_driver()
-    return run_pagerank(driver=driver, limit=limit, graph_name=DEFAULT_GRAPH_NAME)
+# results only change with the graph: ETag / 304 and a short Cache-Control for polling dashboards
+@router.get("/pagerank", response_model=PageRankResponse, dependencies=[Depends(conditional_get())])
+async def pagerank(limit: int = Query(10, ge=1, le=200)):
+    driver = get_async_driver()
+    return await run_pagerank(driver=driver, limit=limit, graph_name=DEFAULT_GRAPH_NAME)
 
 
-@router.get("/louvain", response_model=LouvainResponse)
-def louvain(limit: int = Query(20, ge=1, le=200)):
-    driver = get_driver()
-    return run_louvain(driver=driver, limit=limit, graph_name=DEFAULT_GRAPH_NAME)
+@router.get("/louvain", response_model=LouvainResponse, dependencies=[Depends(conditional_get())])
+async def louvain(limit: int = Query(20, ge=1, le=200)):
+    driver = get_async_driver()
+    return await run_louvain(driver=driver, limit=limit, graph_name=DEFAULT_GRAPH_NAME)
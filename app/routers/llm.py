@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-from app.database import get_driver
+from app.database import read_session
 from app.services.llm_service import run_llm_query
 
 router = APIRouter(prefix="/llm", tags=["LLM"])
@@ -23,11 +23,10 @@ class LLMQueryResponse(BaseModel):
 
 
 @router.post("/query", response_model=LLMQueryResponse)
-def llm_query(payload: LLMQueryRequest):
+async def llm_query(payload: LLMQueryRequest):
     try:
-        driver = get_driver()
-        with driver.session() as session:
-            return run_llm_query(session, payload.question)
+        async with read_session() as session:
+            return await run_llm_query(session, payload.question)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
@@ -1,17 +1,20 @@
 from fastapi import APIRouter, HTTPException, Query
 from neo4j.exceptions import Neo4jError
+from starlette.concurrency import run_in_threadpool
 
-from app.database import get_driver
+from app.database import fetch_rows, get_driver, queries, read_session
 from app.models.ml import TrainMLRequest, TrainMLResponse, RecommendationResponse
-from app.ml.link_predictor import train_and_evaluate, load_model, fetch_features
+from app.ml.link_predictor import train_and_evaluate, load_model, fetch_features_async
 
 router = APIRouter(prefix="/ml", tags=["ML"])
 
 @router.post("/train-link-predictor", response_model=TrainMLResponse)
-def train_link_predictor(payload: TrainMLRequest):
+async def train_link_predictor(payload: TrainMLRequest):
+    # training is CPU-bound scikit-learn work on the sync driver: keep it off the event loop
     driver = get_driver()
     try:
-        auc, acc = train_and_evaluate(
+        auc, acc = await run_in_threadpool(
+            train_and_evaluate,
             driver,
             n_pos=payload.n_pos,
             n_neg=payload.n_neg,
@@ -23,31 +26,28 @@ def train_link_predictor(payload: TrainMLRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _candidate_features(tx, product_id: int):
+    # candidate set = neighbors-of-neighbors (fast + relevant)
+    candidates = await fetch_rows(tx, queries.ML_CANDIDATES, {"pid": product_id})
+    if not candidates:
+        return candidates, None, []
+    pairs = [{"p": product_id, "q": r["cid"]} for r in candidates]
+    X, ids = await fetch_features_async(tx, pairs)
+    return candidates, X, ids
+
+
 @router.get("/recommendations/{product_id}", response_model=RecommendationResponse)
-def recommend(product_id: int, k: int = Query(10, ge=1, le=50)):
+async def recommend(product_id: int, k: int = Query(10, ge=1, le=50)):
     model = load_model()
     if model is None:
         raise HTTPException(status_code=400, detail="Model not trained yet. Call POST /ml/train-link-predictor first.")
 
-    driver = get_driver()
     try:
-        with driver.session() as session:
-            # candidate set = neighbors-of-neighbors (fast + relevant)
-            candidates = session.run(
-                """
-                MATCH (p:Product {product_id: $pid})-[:CO_PURCHASED_WITH]-(n:Product)-[:CO_PURCHASED_WITH]-(c:Product)
-                WHERE c.product_id <> $pid
-                RETURN DISTINCT c.product_id AS cid, c.name AS name
-                LIMIT 2000
-                """,
-                pid=product_id
-            ).data()
-
-            if not candidates:
-                raise HTTPException(status_code=404, detail="No candidates found for this product.")
-
-            pairs = [{"p": product_id, "q": r["cid"]} for r in candidates]
-            X, ids = fetch_features(session, pairs)
+        async with read_session() as session:
+            candidates, X, ids = await session.execute_read(_candidate_features, product_id)
+
+        if not candidates:
+            raise HTTPException(status_code=404, detail="No candidates found for this product.")
 
         proba = model.predict_proba(X)[:, 1]
         scored = []
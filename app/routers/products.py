@@ -1,96 +1,166 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
-from app.database import get_driver
+import orjson
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.database import cached_by_id, cached_by_ids, queries, read_by_id, stream_rows
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
 from app.models.order import (
-    ProductModel,
-    OrderCore,
-    CustomerModel,
+    BatchLookupRequest,
+    ProductBatchResponse,
+    ProductCustomersPage,
+    ProductOrdersPage,
     ProductDetailsResponse,
 )
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# The product queries project exactly the response model fields (queries.ORDER_MAP, ...),
+# so records are returned as plain dicts and response_model validates/serializes them once.
 
-@router.get("/{product_id}", response_model=ProductDetailsResponse)
-def get_product(product_id: str):
+
+def _orders_cursor(order: dict) -> str:
+    return encode_cursor({"date": order["order_date"], "id": order["order_id"]})
+
+
+def _customers_cursor(customer: dict) -> str:
+    return encode_cursor({"id": customer["customer_id"]})
+
+
+def _first_pages(record: Optional[dict]) -> Optional[dict]:
     """
-    Get a product with:
-      - its basic info
-      - the orders that contain it
-      - the customers who bought it
+    Trim a PRODUCT_DETAILS record (which reads one row past each first page) to
+    PRODUCT_DETAILS_LIMIT orders and customers, with the cursors of the next pages.
     """
-    driver = get_driver()
+    if record is None:
+        return None
+    limit = queries.PRODUCT_DETAILS_LIMIT
+    orders, customers = record["orders"], record["customers"]
+    return {
+        **record,
+        "orders": orders[:limit],
+        "customers": customers[:limit],
+        "orders_next_cursor": _orders_cursor(orders[limit - 1]) if len(orders) > limit else None,
+        "customers_next_cursor": _customers_cursor(customers[limit - 1]) if len(customers) > limit else None,
+    }
+
 
-    with driver.session() as session:
-        record = session.run(
-            """
-            MATCH (p:Product)
-            WHERE toString(p.product_id) = $product_id
+@router.post("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(payload: BatchLookupRequest):
+    """
+    Resolve many products with one UNWIND query. Items come back in request order;
+    unknown ids have found=false and no result.
+    """
+    records = await cached_by_ids("product", queries.PRODUCTS_BY_IDS, payload.ids)
 
-            OPTIONAL MATCH (p)<-[:CONTAINS]-(o:Order)
-            OPTIONAL MATCH (o)<-[:PLACED]-(c:Customer)
+    items: List[dict] = []
+    for product_id in payload.ids:
+        record = _first_pages(records[product_id])
+        items.append({"id": product_id, "found": record is not None, "result": record})
 
-            RETURN
-              properties(p) AS product,
-              collect(DISTINCT properties(o)) AS orders,
-              collect(DISTINCT properties(c)) AS customers
-            """,
-            product_id=product_id,
-        ).single()
+    return {"items": items}
 
+
+async def _stored_product(product_id: str) -> dict:
+    record = await read_by_id(queries.PRODUCT_CORE, "product_id", product_id)
     if record is None or record["product"] is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    return record["product"]
+
+
+def _cursor(cursor: Optional[str], keys) -> dict:
+    try:
+        return decode_cursor(cursor, keys)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
-    product_node = record["product"] or {}
-    orders_nodes: List[dict] = record["orders"] or []
-    customers_nodes: List[dict] = record["customers"] or []
 
-    # Pydantic ProductModel
-    product = ProductModel(
-        product_id=product_node.get("product_id"),
-        name=product_node.get("name"),
-        price=product_node.get("price"),
+@router.get("/{product_id}/orders", response_model=ProductOrdersPage)
+async def get_product_orders(
+    product_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    """
+    Orders containing the product, newest first (order_date, then order_id; undated
+    orders last), one keyset page at a time.
+    """
+    after = _cursor(cursor, ("date", "id"))
+
+    # one extra row tells whether there is a next page
+    record = await read_by_id(
+        queries.PRODUCT_ORDERS_PAGE,
+        "product_id",
+        product_id,
+        after_date=after["date"],
+        after_id=after["id"],
+        limit=limit + 1,
     )
+    if record is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    orders = record["orders"]
+    next_cursor = _orders_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return {"product_id": record["product_id"], "items": orders[:limit], "next_cursor": next_cursor}
+
+
+@router.get("/{product_id}/customers", response_model=ProductCustomersPage)
+async def get_product_customers(
+    product_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    """Distinct customers who bought the product, by customer_id, one keyset page at a time."""
+    after = _cursor(cursor, ("id",))
 
-    # Pydantic OrderCore list
-    orders: List[OrderCore] = []
-    for o in orders_nodes:
-        # some orders might be missing if there are no orders, so we guard
-        if o is None:
-            continue
-        orders.append(
-            OrderCore(
-                order_id=int(o.get("order_id")),
-                order_date=o.get("order_date"),
-                shipping_date=o.get("shipping_date"),
-                late_delivery_risk=o.get("late_delivery_risk"),
-                shipping_mode=o.get("shipping_mode"),
-                days_shipping_scheduled=o.get("days_shipping_scheduled"),
-                days_shipping_real=o.get("days_shipping_real"),
-                region=o.get("region"),
-                delivery_status=o.get("delivery_status"),
-                status=o.get("status"),
-            )
-        )
-
-    # Pydantic CustomerModel list
-    customers: List[CustomerModel] = []
-    for c in customers_nodes:
-        if c is None:
-            continue
-        customers.append(
-            CustomerModel(
-                customer_id=c.get("customer_id"),
-                first_name=c.get("first_name"),
-                last_name=c.get("last_name"),
-                city=c.get("city"),
-                country=c.get("country"),
-            )
-        )
-
-    return ProductDetailsResponse(
-        product=product,
-        orders=orders,
-        customers=customers,
+    record = await read_by_id(
+        queries.PRODUCT_CUSTOMERS_PAGE, "product_id", product_id, after_id=after["id"], limit=limit + 1
     )
+    if record is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    customers = record["customers"]
+    next_cursor = _customers_cursor(customers[limit - 1]) if len(customers) > limit else None
+    return {"product_id": record["product_id"], "items": customers[:limit], "next_cursor": next_cursor}
+
+
+def _ndjson(kind: str, data: dict) -> bytes:
+    # no response_model on a stream: the projected record is encoded as-is
+    return orjson.dumps({"type": kind, "data": data}) + b"\n"
+
+
+@router.get("/{product_id}/stream")
+async def stream_product(product_id: str):
+    """
+    The same content as GET /products/{product_id} as NDJSON: one product line, then
+    one line per order and per customer, written while the Neo4j results are consumed.
+    """
+    product = await _stored_product(product_id)
+    pid = product["product_id"]
+
+    async def lines():
+        yield _ndjson("product", product)
+        async for row in stream_rows(queries.PRODUCT_ORDERS_STREAM, product_id=pid):
+            yield _ndjson("order", row["order"])
+        async for row in stream_rows(queries.PRODUCT_CUSTOMERS_STREAM, product_id=pid):
+            yield _ndjson("customer", row["customer"])
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/{product_id}", response_model=ProductDetailsResponse)
+async def get_product(product_id: str):
+    """
+    Get a product with:
+      - its basic info
+      - the first page of the orders that contain it
+      - the first page of the customers who bought it
+    The next pages are on /orders and /customers, from orders_next_cursor and
+    customers_next_cursor.
+    """
+    record = _first_pages(await cached_by_id("product", queries.PRODUCT_DETAILS, "product_id", product_id))
+
+    if record is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    return record
@@ -0,0 +1,369 @@
+"""
+In-process snapshot of the co-purchase graph for path queries.
+
+Products and CO_PURCHASED_WITH edges are loaded into CSR arrays (indptr /
+indices, undirected) when the API starts and again whenever the graph version
+stamp changes (see app/database/cache.py). Shortest and all-shortest paths are
+answered with a bidirectional BFS over the arrays instead of a variable-length
+expansion in Neo4j. While no snapshot of the current version is loaded, callers
+get None and fall back to the Cypher queries.
+
+Edge weights (co-purchase counts) are kept alongside the indices for the
+weighted path search, a bidirectional Dijkstra bounded by expansions and a deadline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import os
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.database import entity_cache, queries, read_rows, stream_rows
+
+logger = logging.getLogger(__name__)
+
+COPURCHASE_ENGINE_ENABLED = os.getenv("COPURCHASE_ENGINE_ENABLED", "1") == "1"
+# after a failed snapshot load, requests keep falling back to Cypher this long before
+# another full reload is attempted
+COPURCHASE_RETRY_SECONDS = float(os.getenv("COPURCHASE_RETRY_SECONDS", "30"))
+# same bound as the Cypher fallback, CO_PURCHASED_WITH*1..5
+MAX_PATH_HOPS = 5
+# allShortestPaths can explode around hubs: stop enumerating after this many
+MAX_ALL_SHORTEST_PATHS = int(os.getenv("MAX_ALL_SHORTEST_PATHS", "1000"))
+# weighted search: settled nodes before giving up (the latency budget is per request)
+WEIGHTED_PATH_MAX_EXPANSIONS = int(os.getenv("WEIGHTED_PATH_MAX_EXPANSIONS", "100000"))
+# default / largest latency budget a request may ask for; an in-process search holds
+# a threadpool thread for at most the largest one
+WEIGHTED_PATH_BUDGET_MS = int(os.getenv("WEIGHTED_PATH_BUDGET_MS", "250"))
+WEIGHTED_PATH_MAX_BUDGET_MS = 1000
+
+# edge cost from the co-purchase weight w (> 0): strong pairs are cheap to cross
+#   inverse: 1 / w
+#   neglog:  -log(w / max w), additive over the path like a log-probability
+PATH_COSTS = ("inverse", "neglog")
+
+
+class PathBudgetExceeded(Exception):
+    """A path search ran out of its expansion or time budget before settling the target."""
+
+
+class CoPurchaseGraph:
+    """Immutable CSR snapshot; node i is product ids[i]."""
+
+    def __init__(
+        self,
+        ids: list,
+        names: list,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        version: Hashable = None,
+        weights: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.names = names
+        self.indptr = indptr
+        self.indices = indices
+        self.version = version
+        # weights[k] belongs to edge indices[k]; unweighted snapshots count every edge once
+        self.weights = weights if weights is not None else np.ones(len(indices))
+        self.index: Dict = {pid: i for i, pid in enumerate(ids)}
+        self._costs: Dict[str, list] = {}
+
+    @classmethod
+    def from_edges(
+        cls,
+        products: Iterable[Tuple],
+        sources: Iterable,
+        targets: Iterable,
+        version: Hashable = None,
+        weights: Optional[Iterable[float]] = None,
+    ):
+        """
+        products: (product_id, name) pairs; sources[k] - targets[k] are the product ids
+        of edge k, in either direction, with weight weights[k] (default 1). Self loops,
+        edges to unknown products and non-positive weights are dropped; of duplicate
+        edges the heaviest is kept.
+        """
+        ids, names = [], []
+        for product_id, name in products:
+            ids.append(product_id)
+            names.append(name)
+        index = {pid: i for i, pid in enumerate(ids)}
+        n = len(ids)
+
+        src = np.fromiter((index.get(pid, -1) for pid in sources), dtype=np.int64)
+        dst = np.fromiter((index.get(pid, -1) for pid in targets), dtype=np.int64)
+        weight = np.ones(len(src)) if weights is None else np.fromiter(weights, dtype=np.float64, count=len(src))
+        keep = (src >= 0) & (dst >= 0) & (src != dst) & (weight > 0)
+        src, dst, weight = src[keep], dst[keep], weight[keep]
+
+        # both directions, sorted by (src, dst) through one int64 key, heaviest duplicate first
+        keys = np.concatenate([src * n + dst, dst * n + src])
+        weight = np.concatenate([weight, weight])
+        order = np.lexsort((-weight, keys))
+        keys, weight = keys[order], weight[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        keys, weight = keys[first], weight[first]
+
+        rows, cols = np.divmod(keys, max(n, 1))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return cls(ids, names, indptr, cols.astype(np.int32), version, weights=weight)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    def _neighbors(self, node: int) -> list:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]].tolist()
+
+    def _search(self, source: int, target: int, max_hops: int):
+        """
+        Level-synchronous bidirectional BFS, expanding the smaller frontier first.
+        Returns (length or None, dist_f, dist_b); the distances are exact for every
+        node they contain.
+        """
+        dist_f, dist_b = {source: 0}, {target: 0}
+        frontier_f, frontier_b = [source], [target]
+        depth_f = depth_b = 0
+        best = None
+
+        while frontier_f and frontier_b and depth_f + depth_b < max_hops:
+            if best is not None and best <= depth_f + depth_b:
+                break
+            forward = len(frontier_f) <= len(frontier_b)
+            frontier, dist, other = (frontier_f, dist_f, dist_b) if forward else (frontier_b, dist_b, dist_f)
+            depth = (depth_f if forward else depth_b) + 1
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self._neighbors(node):
+                    if neighbor not in dist:
+                        dist[neighbor] = depth
+                        next_frontier.append(neighbor)
+                    if neighbor in other:
+                        length = dist[node] + 1 + other[neighbor]
+                        if best is None or length < best:
+                            best = length
+            if forward:
+                frontier_f, depth_f = next_frontier, depth
+            else:
+                frontier_b, depth_b = next_frontier, depth
+
+        if best is not None and best > max_hops:
+            best = None
+        return best, dist_f, dist_b, depth_f, depth_b
+
+    def shortest_path(self, from_id, to_id, max_hops: int = MAX_PATH_HOPS) -> Optional[List]:
+        """Product ids of one shortest path, or None (unknown product, no path within max_hops)."""
+        paths = self.all_shortest_paths(from_id, to_id, max_hops=max_hops, limit=1)
+        return paths[0] if paths else None
+
+    def all_shortest_paths(
+        self, from_id, to_id, max_hops: int = MAX_PATH_HOPS, limit: int = MAX_ALL_SHORTEST_PATHS
+    ) -> List[List]:
+        """Product ids of every shortest path (at most limit of them); [] when there is none."""
+        source, target = self.index.get(from_id), self.index.get(to_id)
+        if source is None or target is None or source == target:
+            return []
+
+        length, dist_f, dist_b, _, depth_b = self._search(source, target, max_hops)
+        if length is None:
+            return []
+
+        # positions 0..split are exact in dist_f, split..length in dist_b (both depths sum to >= length)
+        split = max(0, length - depth_b)
+        meeting = [v for v, d in dist_f.items() if d == split and dist_b.get(v) == length - split]
+
+        def prefixes(node):  # source -> node, through nodes one step closer to the source
+            if node == source:
+                yield [node]
+                return
+            for prev in self._neighbors(node):
+                if dist_f.get(prev) == dist_f[node] - 1:
+                    for path in prefixes(prev):
+                        yield path + [node]
+
+        def suffixes(node):  # node -> target, through nodes one step closer to the target
+            if node == target:
+                yield [node]
+                return
+            for nxt in self._neighbors(node):
+                if dist_b.get(nxt) == dist_b[node] - 1:
+                    for path in suffixes(nxt):
+                        yield [node] + path
+
+        paths = []
+        for node in sorted(meeting):
+            for head in prefixes(node):
+                for tail in suffixes(node):
+                    paths.append([self.ids[i] for i in head + tail[1:]])
+                    if len(paths) >= limit:
+                        return paths
+        return paths
+
+    def edge_costs(self, cost: str) -> list:
+        """Cost of every CSR edge (aligned with indices) for one of PATH_COSTS, computed once."""
+        if cost not in self._costs:
+            if cost == "inverse":
+                values = 1.0 / self.weights
+            elif cost == "neglog":
+                top = self.weights.max() if len(self.weights) else 1.0
+                # the strongest pair costs 0; clip the -0.0 of log(1)
+                values = np.maximum(-np.log(self.weights / top), 0.0)
+            else:
+                raise ValueError(f"Unknown path cost {cost!r}, expected one of {PATH_COSTS}")
+            self._costs[cost] = values.tolist()
+        return self._costs[cost]
+
+    def weighted_path(
+        self,
+        from_id,
+        to_id,
+        cost: str = "inverse",
+        max_expansions: int = WEIGHTED_PATH_MAX_EXPANSIONS,
+        deadline: Optional[float] = None,
+    ) -> Optional[Tuple[List, float]]:
+        """
+        Cheapest path (product ids, total cost) by bidirectional Dijkstra, or None
+        (unknown product, not connected). Raises PathBudgetExceeded after
+        max_expansions settled nodes or once time.monotonic() passes deadline, so a
+        far or hub-heavy pair cannot hold the worker.
+        """
+        source, target = self.index.get(from_id), self.index.get(to_id)
+        if source is None or target is None or source == target:
+            return None
+        costs = self.edge_costs(cost)
+        indptr, indices = self.indptr, self.indices
+        heappush, heappop = heapq.heappush, heapq.heappop
+        inf = float("inf")
+
+        # bidirectional: settle from whichever side has the cheaper tentative node,
+        # stop once the two cheapest tentative costs add up to the best meeting
+        dist = ({source: 0.0}, {target: 0.0})
+        prev: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        settled = (set(), set())
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meeting = inf, None
+        expanded = 0
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, node = heappop(heaps[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+            expanded += 1
+            if expanded > max_expansions:
+                raise PathBudgetExceeded(f"gave up after expanding {max_expansions} products")
+            # the clock is read every 64 expansions, not on every pop
+            if deadline is not None and expanded % 64 == 0 and time.monotonic() > deadline:
+                raise PathBudgetExceeded(f"latency budget spent after expanding {expanded} products")
+
+            own, other = dist[side], dist[1 - side]
+            start, end = int(indptr[node]), int(indptr[node + 1])
+            for neighbor, edge_cost in zip(indices[start:end].tolist(), costs[start:end]):
+                nd = d + edge_cost
+                if nd < own.get(neighbor, inf):
+                    own[neighbor] = nd
+                    prev[side][neighbor] = node
+                    heappush(heaps[side], (nd, neighbor))
+                through = nd + other.get(neighbor, inf)
+                if through < best:
+                    best, meeting = through, neighbor
+
+        if meeting is None:
+            return None
+        path = [meeting]
+        while path[0] != source:
+            path.insert(0, prev[0][path[0]])
+        while path[-1] != target:
+            path.append(prev[1][path[-1]])
+        return [self.ids[i] for i in path], best
+
+    def describe(self, path: List) -> dict:
+        """Path of product ids -> the {products, length} shape of the path endpoints."""
+        return {
+            "products": [{"product_id": pid, "name": self.names[self.index[pid]]} for pid in path],
+            "length": len(path) - 1,
+        }
+
+
+async def load_copurchase_graph(version: Hashable = None) -> CoPurchaseGraph:
+    products = await read_rows(queries.COPURCHASE_PRODUCTS)
+    # edges are streamed into id / weight lists instead of one dict per edge
+    sources, targets, weights = [], [], []
+    async for row in stream_rows(queries.COPURCHASE_EDGES):
+        sources.append(row["a"])
+        targets.append(row["b"])
+        weights.append(row["weight"])
+    return CoPurchaseGraph.from_edges(
+        ((p["product_id"], p["name"]) for p in products), sources, targets, version=version, weights=weights
+    )
+
+
+class CoPurchaseEngine:
+    """Holds the current snapshot and reloads it in the background when the graph version changes."""
+
+    def __init__(
+        self,
+        enabled: bool = COPURCHASE_ENGINE_ENABLED,
+        loader=load_copurchase_graph,
+        retry_seconds: float = COPURCHASE_RETRY_SECONDS,
+    ):
+        self.enabled = enabled
+        self._loader = loader
+        self.retry_seconds = retry_seconds
+        self.graph: Optional[CoPurchaseGraph] = None
+        self._loading: Optional[asyncio.Task] = None
+        self._failed_at: Optional[float] = None
+
+    async def refresh(self, version: Hashable) -> Optional[CoPurchaseGraph]:
+        t0 = time.perf_counter()
+        try:
+            graph = await self._loader(version)
+        except Exception as e:
+            self._failed_at = time.monotonic()
+            logger.warning(
+                "Loading the co-purchase graph snapshot failed (retrying in %.0fs): %s", self.retry_seconds, e
+            )
+            return None
+        self._failed_at = None
+        self.graph = graph
+        logger.info(
+            "Co-purchase snapshot v%s: %d products, %d edges, %.1f MB CSR, loaded in %.2fs",
+            version, len(graph.ids), graph.edge_count, graph.nbytes() / 1e6, time.perf_counter() - t0,
+        )
+        return graph
+
+    def schedule_refresh(self, version: Hashable) -> None:
+        """Start a background reload unless one is already running or the last one failed recently."""
+        if self._loading is not None and not self._loading.done():
+            return
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+            return
+        self._loading = asyncio.get_running_loop().create_task(self.refresh(version))
+
+    async def snapshot(self) -> Optional[CoPurchaseGraph]:
+        """The snapshot of the current graph version, or None (stale / missing: reload scheduled)."""
+        if not self.enabled:
+            return None
+        version = await entity_cache.version()
+        if self.graph is not None and self.graph.version == version:
+            return self.graph
+        self.schedule_refresh(version)
+        return None
+
+    async def drain(self) -> None:
+        if self._loading is not None:
+            await asyncio.gather(self._loading, return_exceptions=True)
+
+
+copurchase_engine = CoPurchaseEngine()
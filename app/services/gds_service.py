@@ -2,123 +2,166 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import os
+import time
+from typing import Any, Dict, Optional
 
-from neo4j import Driver
+from neo4j import READ_ACCESS, AsyncDriver, unit_of_work
 from neo4j.exceptions import Neo4jError
 
+from app.database import entity_cache, fetch_rows, fetch_single, queries
+from app.database.queries import NamedQuery
+from app.services.copurchase_graph import PathBudgetExceeded
+
 
 DEFAULT_GRAPH_NAME = "productCopurchase"
+# relationship property per path cost instead of the raw weight; one projection
+# per graph version ("productCopurchaseCost-<version>") so a reseed re-projects
+COST_GRAPH_NAME = "productCopurchaseCost"
+# after the plugin was found missing, go straight to the fallback for this long
+GDS_RETRY_INTERVAL = float(os.getenv("GDS_RETRY_INTERVAL", "60"))
+
+
+class GdsUnavailable(Exception):
+    """The GDS plugin (or the projection a call needs) is missing on the server that answered."""
 
 
-def ensure_product_graph(session, graph_name: str = DEFAULT_GRAPH_NAME) -> str:
+class GdsAvailability:
+    """
+    Remembers that the GDS procedures are not installed, so callers skip the failing
+    round trip (and its error metric) for retry_interval seconds.
+    """
+
+    def __init__(self, retry_interval: float = GDS_RETRY_INTERVAL, clock=time.monotonic):
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._missing_at: Optional[float] = None
+
+    def available(self) -> bool:
+        return self._missing_at is None or self._clock() - self._missing_at >= self.retry_interval
+
+    def mark_missing(self) -> None:
+        self._missing_at = self._clock()
+
+    def mark_present(self) -> None:
+        self._missing_at = None
+
+
+gds_availability = GdsAvailability()
+
+
+async def ensure_product_graph(tx, graph_name: str = DEFAULT_GRAPH_NAME) -> str:
     """
     Ensure the in-memory GDS projection exists.
     Projection: Product nodes + CO_PURCHASED_WITH relationships (undirected, weighted).
     """
-    exists = session.run(
-        """
-        CALL gds.graph.exists($name) YIELD exists
-        RETURN exists
-        """,
-        name=graph_name,
-    ).single()["exists"]
+    exists = (await fetch_single(tx, queries.GDS_GRAPH_EXISTS, {"name": graph_name}))["exists"]
 
     if not exists:
-        session.run(
-            """
-            CALL gds.graph.project(
-              $name,
-              'Product',
-              {
-                CO_PURCHASED_WITH: {
-                  orientation: 'UNDIRECTED',
-                  properties: 'weight'
-                }
-              }
-            )
-            """,
-            name=graph_name,
-        )
+        await fetch_rows(tx, queries.GDS_GRAPH_PROJECT, {"name": graph_name})
 
     return graph_name
 
 
-def run_pagerank(driver: Driver, limit: int = 10, graph_name: str = DEFAULT_GRAPH_NAME) -> Dict[str, Any]:
-    """
-    Runs PageRank on the projected product co-purchase graph.
-    Returns top products by PageRank score.
-    """
-    with driver.session() as session:
+async def _stream_on_projection(tx, stream: NamedQuery, graph_name: str, limit: int):
+    # projection check + stream in one transaction: the GDS graph catalog is
+    # per cluster member, so both must run on the same (read) server
+    gname = await ensure_product_graph(tx, graph_name)
+    rows = await fetch_rows(tx, stream, {"graph": gname, "limit": limit})
+    return gname, rows
+
+
+async def _run_algorithm(
+    driver: AsyncDriver, stream: NamedQuery, fallback: NamedQuery, fallback_suffix: str, limit: int, graph_name: str
+) -> Dict[str, Any]:
+    async with driver.session(default_access_mode=READ_ACCESS) as session:
         try:
-            gname = ensure_product_graph(session, graph_name)
-
-            rows = session.run(
-                """
-                CALL gds.pageRank.stream($graph, { relationshipWeightProperty: 'weight' })
-                YIELD nodeId, score
-                WITH gds.util.asNode(nodeId) AS p, score
-                RETURN p.product_id AS product_id, p.name AS name, score
-                ORDER BY score DESC
-                LIMIT $limit
-                """,
-                graph=gname,
-                limit=limit,
-            ).data()
-            graph_used = gname
+            graph_used, rows = await session.execute_read(_stream_on_projection, stream, graph_name, limit)
         except Neo4jError:
-            # GDS plugin unavailable (or graph creation failed) - fall back to a simple
-            # degree-based score so the endpoint still returns a meaningful response.
-            rows = session.run(
-                """
-                MATCH (p:Product)-[r:CO_PURCHASED_WITH]-()
-                WITH p, coalesce(sum(r.weight), 0) AS score
-                RETURN p.product_id AS product_id, p.name AS name, score
-                ORDER BY score DESC
-                LIMIT $limit
-                """,
-                limit=limit,
-            ).data()
-            graph_used = f"{graph_name}-fallback-degree"
+            rows = await session.execute_read(fetch_rows, fallback, {"limit": limit})
+            graph_used = f"{graph_name}-{fallback_suffix}"
 
     return {"graph": graph_used, "limit": limit, "results": rows}
 
 
-def run_louvain(driver: Driver, limit: int = 20, graph_name: str = DEFAULT_GRAPH_NAME) -> Dict[str, Any]:
+async def run_pagerank(driver: AsyncDriver, limit: int = 10, graph_name: str = DEFAULT_GRAPH_NAME) -> Dict[str, Any]:
+    """
+    Runs PageRank on the projected product co-purchase graph.
+    Returns top products by PageRank score.
+    """
+    return await _run_algorithm(
+        driver, queries.PAGERANK_STREAM, queries.PAGERANK_FALLBACK, "fallback-degree", limit, graph_name
+    )
+
+
+async def run_louvain(driver: AsyncDriver, limit: int = 20, graph_name: str = DEFAULT_GRAPH_NAME) -> Dict[str, Any]:
     """
     Runs Louvain community detection on the projected product co-purchase graph.
     Returns a flat list of products with their community_id (simple + easy to grade).
     """
-    with driver.session() as session:
-        try:
-            gname = ensure_product_graph(session, graph_name)
-
-            rows = session.run(
-                """
-                CALL gds.louvain.stream($graph, { relationshipWeightProperty: 'weight' })
-                YIELD nodeId, communityId
-                WITH gds.util.asNode(nodeId) AS p, communityId
-                RETURN p.product_id AS product_id, p.name AS name, communityId AS community_id
-                ORDER BY community_id ASC, product_id ASC
-                LIMIT $limit
-                """,
-                graph=gname,
-                limit=limit,
-            ).data()
-            graph_used = gname
-        except Neo4jError:
-            # No GDS plugin available - return deterministic buckets by product id
-            # so the endpoint remains stable for callers.
-            rows = session.run(
-                """
-                MATCH (p:Product)
-                WITH p, toInteger(p.product_id) AS community_id
-                RETURN p.product_id AS product_id, p.name AS name, community_id
-                ORDER BY community_id ASC, product_id ASC
-                LIMIT $limit
-                """,
-                limit=limit,
-            ).data()
-            graph_used = f"{graph_name}-fallback-community"
+    return await _run_algorithm(
+        driver, queries.LOUVAIN_STREAM, queries.LOUVAIN_FALLBACK, "fallback-community", limit, graph_name
+    )
 
-    return {"graph": graph_used, "limit": limit, "results": rows}
+
+def cost_graph_name(version, graph_name: str = COST_GRAPH_NAME) -> str:
+    return f"{graph_name}-{version}"
+
+
+async def ensure_cost_graph(tx, graph_name: str) -> str:
+    """
+    Ensure the cost projection (Product + CO_PURCHASED_WITH with inverse / neglog costs)
+    of this graph version exists; projecting it drops those of earlier versions.
+    """
+    exists = (await fetch_single(tx, queries.GDS_GRAPH_EXISTS, {"name": graph_name}))["exists"]
+
+    if not exists:
+        await fetch_rows(tx, queries.GDS_COST_GRAPH_PROJECT, {"name": graph_name})
+        prefix = graph_name.rsplit("-", 1)[0] + "-"
+        await fetch_single(tx, queries.GDS_DROP_STALE_GRAPHS, {"prefix": prefix, "name": graph_name})
+
+    return graph_name
+
+
+def _error_code(error: Neo4jError) -> str:
+    return getattr(error, "code", None) or ""
+
+
+async def run_weighted_path(
+    driver: AsyncDriver,
+    from_id: int,
+    to_id: int,
+    cost: str = "inverse",
+    budget: float = 1.0,
+    graph_name: str = COST_GRAPH_NAME,
+) -> Optional[Dict[str, Any]]:
+    """
+    Cheapest co-purchase path by GDS Dijkstra: {products, length, total_cost}, or None.
+
+    The projection of the current graph version is ensured in its own transaction
+    (a one-off cost, not charged to the request budget); the Dijkstra transaction
+    runs with budget seconds as its server-side timeout, so the database stops the
+    search rather than the worker waiting on it. Raises PathBudgetExceeded on that
+    timeout and GdsUnavailable for any other Neo4j error (no plugin, projection
+    dropped by a newer version or on another cluster member); a missing plugin is
+    remembered for GDS_RETRY_INTERVAL seconds.
+    """
+    if not gds_availability.available():
+        raise GdsUnavailable("GDS procedures not installed")
+
+    dijkstra = unit_of_work(timeout=budget)(fetch_single)
+    name = cost_graph_name(await entity_cache.version(), graph_name)
+    params = {"graph": name, "from_id": from_id, "to_id": to_id, "cost": cost}
+    async with driver.session(default_access_mode=READ_ACCESS) as session:
+        try:
+            await session.execute_read(ensure_cost_graph, name)
+            record = await session.execute_read(dijkstra, queries.WEIGHTED_PATH_DIJKSTRA, params)
+        except Neo4jError as e:
+            code = _error_code(e)
+            if "TransactionTimedOut" in code:
+                raise PathBudgetExceeded(f"latency budget of {budget * 1000:.0f} ms spent in GDS Dijkstra") from e
+            if code.endswith("ProcedureNotFound"):
+                gds_availability.mark_missing()
+            raise GdsUnavailable(str(e)) from e
+    gds_availability.mark_present()
+    return record
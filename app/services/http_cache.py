@@ -0,0 +1,55 @@
+"""
+Conditional GET for read endpoints whose payload only changes with the graph.
+
+The ETag is derived from the graph version stamp (the one keying the entity
+cache), the API version, the path and the query parameters, so a matching
+If-None-Match is answered with 304 before any query runs. Cache-Control lets
+nginx (proxy_cache in nginx.conf) and browsers reuse the response for max_age
+seconds, then revalidate it with the ETag.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from app.database import entity_cache
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "5"))
+
+
+def make_etag(*parts, query: Iterable[Tuple[str, str]] = ()) -> str:
+    """Weak ETag: the same representation for the same inputs, not byte-for-byte (gzip may re-encode)."""
+    raw = "|".join(str(part) for part in parts) + "?" + "&".join(f"{k}={v}" for k, v in sorted(query))
+    return 'W/"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2) of an If-None-Match header against etag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_get(max_age: int = HTTP_CACHE_MAX_AGE):
+    """
+    Route dependency: sets ETag / Cache-Control on the response, or ends the request
+    with 304 Not Modified when the client already has this version.
+    """
+
+    async def dependency(request: Request, response: Response) -> str:
+        version = await entity_cache.version()
+        etag = make_etag(request.app.version, version, request.url.path, query=request.query_params.multi_items())
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+    return dependency
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import re
@@ -6,6 +7,9 @@ from typing import Any, Dict
 
 import requests
 
+from app.database import fetch_rows, fetch_single, queries
+from app.metrics import GROQ_SECONDS
+
 # ----------------------------
 # Groq config (interpretation only)
 # ----------------------------
@@ -17,33 +21,12 @@ GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
 # Cypher templates (safe, deterministic)
 # ----------------------------
 
-# 1-hop: products directly co-purchased with product_id
-CYPHER_COPURCHASE = """
-MATCH (p1:Product {product_id: $product_id})-[r:CO_PURCHASED_WITH]-(p2:Product)
-RETURN p2.product_id AS product_id, p2.name AS name, r.weight AS weight
-ORDER BY weight DESC
-LIMIT $limit
-""".strip()
-
-# 2-hop recommendations: "people who bought X also bought Y" via shared neighbor
-CYPHER_RECOMMEND_2HOP = """
-MATCH (p:Product {product_id: $product_id})-[r1:CO_PURCHASED_WITH]-(mid:Product)-[r2:CO_PURCHASED_WITH]-(rec:Product)
-WHERE rec.product_id <> $product_id
-WITH rec, SUM(r1.weight + r2.weight) AS score
-RETURN rec.product_id AS product_id, rec.name AS name, score AS score
-ORDER BY score DESC
-LIMIT $limit
-""".strip()
-
-# shortest path between two products (cap hops to keep it cheap)
-CYPHER_CONNECTION = """
-MATCH (a:Product {product_id: $from_id}),
-      (b:Product {product_id: $to_id})
-MATCH p = shortestPath((a)-[:CO_PURCHASED_WITH*..4]-(b))
-RETURN [n IN nodes(p) | {product_id: n.product_id, name: n.name}] AS path,
-       length(p) AS length
-LIMIT 1
-""".strip()
+# the templates live in the query registry and are run as the NamedQuery objects (so
+# metrics and the slow query log see their names); the text aliases are kept for
+# callers that need the Cypher itself
+CYPHER_COPURCHASE = queries.LLM_COPURCHASE.text
+CYPHER_RECOMMEND_2HOP = queries.LLM_RECOMMEND_2HOP.text
+CYPHER_CONNECTION = queries.LLM_CONNECTION.text
 
 
 # ----------------------------
@@ -133,17 +116,23 @@ def groq_interpret(question: str, intent: Dict[str, Any], data: Any) -> str:
         ],
     }
 
-    r = requests.post(
-        GROQ_URL,
-        headers={
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json",
-        },
-        json=payload,
-        timeout=30,
-    )
-    r.raise_for_status()
-    out = r.json()
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        r = requests.post(
+            GROQ_URL,
+            headers={
+                "Authorization": f"Bearer {GROQ_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            json=payload,
+            timeout=30,
+        )
+        r.raise_for_status()
+        out = r.json()
+        outcome = "ok"
+    finally:
+        GROQ_SECONDS.labels(outcome).observe(time.perf_counter() - t0)
     return out["choices"][0]["message"]["content"].strip()
 
 
@@ -151,7 +140,7 @@ def groq_interpret(question: str, intent: Dict[str, Any], data: Any) -> str:
 # Main entry point used by the router
 # ----------------------------
 
-def run_llm_query(session, question: str) -> Dict[str, Any]:
+async def run_llm_query(session, question: str) -> Dict[str, Any]:
     t0 = time.time()
     intent = parse_intent(question)
 
@@ -171,27 +160,28 @@ def run_llm_query(session, question: str) -> Dict[str, Any]:
         }
 
     if intent["type"] == "copurchase":
-        cypher = CYPHER_COPURCHASE
+        query = queries.LLM_COPURCHASE
         params = {"product_id": intent["product_id"], "limit": intent["limit"]}
-        records = session.run(cypher, **params).data()
+        records = await session.execute_read(fetch_rows, query, params)
 
     elif intent["type"] == "recommend":
-        cypher = CYPHER_RECOMMEND_2HOP
+        query = queries.LLM_RECOMMEND_2HOP
         params = {"product_id": intent["product_id"], "limit": intent["limit"]}
-        records = session.run(cypher, **params).data()
+        records = await session.execute_read(fetch_rows, query, params)
 
     else:  # connection
-        cypher = CYPHER_CONNECTION
+        query = queries.LLM_CONNECTION
         params = {"from_id": intent["from_id"], "to_id": intent["to_id"]}
-        one = session.run(cypher, **params).single()
-        records = [dict(one)] if one else []
+        one = await session.execute_read(fetch_single, query, params)
+        records = [one] if one else []
 
-    interpretation = groq_interpret(question, intent, records)
+    # blocking HTTP call to Groq: run it in a worker thread
+    interpretation = await asyncio.to_thread(groq_interpret, question, intent, records)
 
     return {
         "question": question,
         "intent": intent["type"],
-        "cypher": cypher,
+        "cypher": query.text,
         "params": params,
         "rows": len(records),
         "latency_ms": int((time.time() - t0) * 1000),
@@ -0,0 +1,35 @@
+"""
+Opaque keyset cursors: the sort key of the last row served, as url-safe base64 JSON.
+Keyset pages stay O(page) however deep the client scrolls, unlike SKIP/LIMIT.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, Iterable, Optional
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], keys: Iterable[str]) -> Dict[str, Any]:
+    """{key: None} for no cursor (first page), else the decoded values; InvalidCursor if malformed."""
+    keys = list(keys)
+    if not cursor:
+        return {key: None for key in keys}
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(values, dict) or set(values) != set(keys):
+        raise InvalidCursor("Malformed cursor")
+    return values
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+
+# ---------------------------------------------------------------------
+# Concurrency benchmark: N requests in flight at once against the API.
+#   python scripts/bench_concurrency.py --url http://localhost --path /orders/1 -c 500
+# Without --url the app runs in-process against a fake Neo4j that answers
+# every query after --latency-ms, which isolates the server's concurrency
+# (async routers on the event loop) from the database.
+# ---------------------------------------------------------------------
+FAKE_RECORD = {
+    "order": {"order_id": 1, "order_date": "1/31/2018 22:56"},
+    "customer": {"customer_id": 10},
+    "products": [{"product_id": 100, "name": "Widget", "price": 9.99}],
+    "version": "bench",  # graph version stamp, read by the entity cache
+}
+
+
+class _AsyncResult:
+    async def single(self):
+        return FAKE_RECORD
+
+    async def data(self):
+        return [FAKE_RECORD]
+
+    async def consume(self):
+        return None
+
+
+class _AsyncSession:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def run(self, *_args, **_kwargs):
+        await asyncio.sleep(self._latency)
+        return _AsyncResult()
+
+    async def execute_read(self, fn, *args, **kwargs):
+        return await fn(self, *args, **kwargs)
+
+
+class _FakeDriver:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    def session(self, **_kwargs):
+        return _AsyncSession(self._latency)
+
+
+def in_process_client(latency_ms: float) -> httpx.AsyncClient:
+    from app import database
+    from app.main import app
+
+    database._async_driver = _FakeDriver(latency_ms / 1000)
+    # every request should wait on the fake database, not be answered from the cache
+    database.entity_cache.enabled = False
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def run_benchmark(client: httpx.AsyncClient, path: str, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(path)
+                if r.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": requests / elapsed,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def main_async(args) -> None:
+    if args.url:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120)
+    else:
+        client = in_process_client(args.latency_ms)
+
+    async with client:
+        stats = await run_benchmark(client, args.path, args.concurrency, args.requests)
+
+    target = args.url or f"in-process app, fake Neo4j latency {args.latency_ms:g} ms"
+    print(f"🏁 {args.path} ({target})")
+    print(
+        f"   {stats['requests']} requests, {stats['concurrency']} in flight, {stats['errors']} errors, "
+        f"{stats['seconds']:.2f}s -> {stats['rps']:,.0f} req/s"
+    )
+    print(
+        f"   latency p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms, "
+        f"p99 {stats['p99_ms']:.0f} ms (mean {stats['mean_ms']:.0f} ms)"
+    )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fire many concurrent requests at the API.")
+    parser.add_argument("--url", help="base URL of a running API (default: in-process app with a fake Neo4j)")
+    parser.add_argument("--path", default="/orders/1")
+    parser.add_argument("-c", "--concurrency", type=int, default=500)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake Neo4j latency (in-process mode)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async(parse_args()))
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.routing import APIRoute, serialize_response
+
+from app.models.order import CustomerModel, OrderCore, ProductDetailsResponse, ProductModel
+from app.routers.products import router
+
+
+# ---------------------------------------------------------------------
+# Serialization microbenchmark, no Neo4j involved:
+#   python scripts/bench_serialization.py --rows 1000 --repeat 50
+# Times what happens to an already fetched GET /products/{id} record:
+#   models: build Pydantic objects row by row, then FastAPI validates and dumps them
+#   dicts:  return the map-projected record, FastAPI validates and dumps it once
+# and the per-line encoding of /products/{id}/stream (json + model_dump vs orjson).
+# ---------------------------------------------------------------------
+
+
+def fake_record(rows: int) -> dict:
+    return {
+        "product": {"product_id": 7, "name": "Widget", "price": 9.99},
+        "orders": [
+            {
+                "order_id": i,
+                "order_date": "1/31/2018 22:56",
+                "shipping_date": "2/3/2018 22:56",
+                "late_delivery_risk": i % 2,
+                "shipping_mode": "Standard Class",
+                "days_shipping_scheduled": 4,
+                "days_shipping_real": 3,
+                "region": "Western Europe",
+                "delivery_status": "Advance shipping",
+                "status": "COMPLETE",
+            }
+            for i in range(rows)
+        ],
+        "customers": [
+            {"customer_id": i, "first_name": "Ada", "last_name": "Lovelace", "city": "Paris", "country": "France"}
+            for i in range(rows)
+        ],
+    }
+
+
+def build_models(record: dict) -> ProductDetailsResponse:
+    # what the router used to do before returning
+    return ProductDetailsResponse(
+        product=ProductModel(**record["product"]),
+        orders=[OrderCore(**o) for o in record["orders"]],
+        customers=[CustomerModel(**c) for c in record["customers"]],
+    )
+
+
+def product_field():
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.path == "/products/{product_id}":
+            return route.response_field
+    raise RuntimeError("GET /products/{product_id} not registered")
+
+
+def timed(fn, repeat: int) -> float:
+    """Median milliseconds of fn() over repeat runs."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization microbenchmark")
+    parser.add_argument("--rows", type=int, default=1000, help="orders and customers in the record")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    record = fake_record(args.rows)
+    field = product_field()
+    loop = asyncio.new_event_loop()
+
+    def respond(content):
+        return loop.run_until_complete(serialize_response(field=field, response_content=content, dump_json=True))
+
+    assert respond(build_models(record)) == respond(record)
+
+    results = {
+        "models + response_model": timed(lambda: respond(build_models(record)), args.repeat),
+        "dicts + response_model": timed(lambda: respond(record), args.repeat),
+        "ndjson json.dumps(model_dump)": timed(
+            lambda: [
+                json.dumps({"type": "order", "data": OrderCore(**o).model_dump(mode="json")}) for o in record["orders"]
+            ],
+            args.repeat,
+        ),
+        "ndjson orjson(dict)": timed(
+            lambda: [orjson.dumps({"type": "order", "data": o}) for o in record["orders"]],
+            args.repeat,
+        ),
+    }
+    loop.close()
+
+    print(f"{args.rows} orders + {args.rows} customers, median of {args.repeat} runs")
+    for name, ms in results.items():
+        print(f"  {name:32s} {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
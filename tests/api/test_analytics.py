@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from neo4j import GraphDatabase
+
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "")
+
+
+def _plan_operators(plan):
+    yield plan["operatorType"].split("@")[0]
+    for child in plan.get("children", []):
+        yield from _plan_operators(child)
+
+
+def _explain(query):
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        with driver.session() as session:
+            return session.run("EXPLAIN " + query.text, query.params).consume().plan
+    finally:
+        driver.close()
+
+
+@pytest.mark.cypher
+def test_top_products_reads_counters_in_index_order():
+    from app.database import queries
+
+    operators = set(_plan_operators(_explain(queries.TOP_PRODUCTS)))
+
+    assert "NodeIndexScan" in operators, sorted(operators)
+    # the index provides the order: no sort and no aggregation over CONTAINS
+    assert not operators & {"Sort", "Top", "EagerAggregation", "Expand(All)"}, sorted(operators)
+
+
+def _index_details(plan):
+    details = (plan.get("args") or {}).get("Details") or ""
+    yield plan["operatorType"].split("@")[0], details
+    for child in plan.get("children", []):
+        yield from _index_details(child)
+
+
+@pytest.mark.cypher
+@pytest.mark.parametrize(
+    "query_name, index",
+    [
+        ("LATE_DELIVERIES_BY_DEPARTMENT_REGION", "o:Order(region)"),
+        ("LATE_DELIVERIES_BY_DEPARTMENT_DATES", "o:Order(order_date)"),
+        ("LATE_DELIVERIES_BY_DEPARTMENT_REGION_SHIPPING", "o:Order(region, shipping_mode)"),
+    ],
+)
+def test_late_deliveries_start_from_the_order_index(query_name, index):
+    from app.database import queries
+
+    operators = list(_index_details(_explain(getattr(queries, query_name))))
+
+    # chosen by the planner (no USING INDEX hint)
+    assert any(op.startswith("NodeIndexSeek") and index in details for op, details in operators), operators
+    assert "NodeByLabelScan" not in {op for op, _ in operators}
+    # counted while streaming: no collect() of the department's orders
+    assert "collect(" not in getattr(queries, query_name).text
+
+
+@pytest.mark.cypher
+def test_late_deliveries_series_seeks_the_order_date_range():
+    from app.database import queries
+
+    operators = list(_index_details(_explain(queries.LATE_DELIVERIES_SERIES)))
+
+    assert any(op.startswith("NodeIndexSeek") and "o:Order(order_date)" in details for op, details in operators), operators
@@ -40,4 +40,32 @@ def test_cypher_has_products():
             assert rec is not None
             assert rec["n"] > 0
     finally:
-        driver.close()
\ No newline at end of file
+        driver.close()
+
+def _plan_operators(plan):
+    yield plan["operatorType"].split("@")[0]
+    for child in plan.get("children", []):
+        yield from _plan_operators(child)
+
+
+@pytest.mark.cypher
+def test_order_and_product_lookups_seek_the_unique_index():
+    from app.database import queries
+
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        with driver.session() as session:
+            for query in (
+                queries.ORDER_DETAILS,
+                queries.PRODUCT_DETAILS,
+                queries.ORDERS_BY_IDS,
+                queries.PRODUCTS_BY_IDS,
+                queries.PRODUCT_ORDERS_PAGE,
+                queries.PRODUCT_CUSTOMERS_PAGE,
+            ):
+                summary = session.run("EXPLAIN " + query.text, query.params).consume()
+                operators = set(_plan_operators(summary.plan))
+                assert "NodeUniqueIndexSeek" in operators, f"{query.name}: {sorted(operators)}"
+                assert "NodeByLabelScan" not in operators
+    finally:
+        driver.close()
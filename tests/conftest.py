@@ -13,6 +13,24 @@ def api_url():
     return os.getenv("API_URL", "http://localhost")
 
 
+@pytest.fixture(autouse=True)
+def no_entity_cache(monkeypatch):
+    """
+    Router tests fake Neo4j per test: the process-wide entity cache would leak records
+    between them, and the graph version (ETags) is pinned instead of read from Neo4j.
+    """
+    from app.database import entity_cache
+    from app.services.copurchase_graph import copurchase_engine
+
+    async def version():
+        return "test"
+
+    monkeypatch.setattr(entity_cache, "enabled", False)
+    monkeypatch.setattr(entity_cache, "version", version)
+    # no background snapshot loads: path endpoints use the (faked) Cypher queries
+    monkeypatch.setattr(copurchase_engine, "enabled", False)
+
+
 class MockRunResult:
     """
     Minimal neo4j result stub supporting .data() and .single().
@@ -54,12 +72,19 @@ class MockSession:
             return result
         return MockRunResult(self._data_rows, self._single_row)
 
+    # managed transactions: the session doubles as the transaction
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
 
 class MockDriver:
     def __init__(self, session: MockSession):
         self._session = session
 
-    def session(self):
+    def session(self, **_kwargs):
         return self._session
 
     def close(self):
@@ -73,3 +98,81 @@ def mock_driver_factory():
         return MockDriver(session)
 
     return _factory
+
+
+class MockAsyncRunResult:
+    """
+    Async counterpart of MockRunResult (AsyncResult: awaitable .data()/.single(), async iteration).
+    """
+
+    def __init__(self, data_rows: Optional[List[dict]] = None, single_row: Optional[dict] = None):
+        self._data_rows = data_rows or []
+        self._single_row = single_row
+
+    async def data(self) -> List[dict]:
+        return self._data_rows
+
+    async def single(self) -> Optional[dict]:
+        return self._single_row
+
+    async def consume(self):
+        return None
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for row in self._data_rows:
+            yield row
+
+
+class MockAsyncSession:
+    def __init__(
+        self,
+        data_rows: Optional[List[dict]] = None,
+        single_row: Optional[dict] = None,
+        side_effect: Optional[Callable[..., Any]] = None,
+    ):
+        self._data_rows = data_rows or []
+        self._single_row = single_row
+        self._side_effect = side_effect
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def run(self, *args, **kwargs):
+        if self._side_effect:
+            result = self._side_effect(*args, **kwargs)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return MockAsyncRunResult(self._data_rows, self._single_row)
+
+    async def execute_read(self, fn, *args, **kwargs):
+        return await fn(self, *args, **kwargs)
+
+    async def execute_write(self, fn, *args, **kwargs):
+        return await fn(self, *args, **kwargs)
+
+
+class MockAsyncDriver:
+    def __init__(self, session: MockAsyncSession):
+        self._session = session
+
+    def session(self, **_kwargs):
+        return self._session
+
+    async def close(self):
+        return None
+
+
+@pytest.fixture
+def mock_async_driver_factory():
+    def _factory(data_rows=None, single_row=None, side_effect=None):
+        session = MockAsyncSession(data_rows=data_rows, single_row=single_row, side_effect=side_effect)
+        return MockAsyncDriver(session)
+
+    return _factory
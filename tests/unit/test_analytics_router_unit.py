@@ -0,0 +1,106 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.database import queries
+from app.routers import analytics as analytics_router
+
+client = TestClient(main.app)
+
+
+def test_top_products_reads_counters_unless_fresh(monkeypatch):
+    calls = []
+
+    async def fake_read_rows(query, **params):
+        calls.append(query.name)
+        return [{"product_id": 1, "name": "Widget", "times_ordered": 3, "total_quantity": 5}]
+
+    monkeypatch.setattr(analytics_router, "read_rows", fake_read_rows)
+
+    assert client.get("/analytics/top-products?limit=1").json()["items"][0]["times_ordered"] == 3
+    assert client.get("/analytics/top-products?limit=1&fresh=true").status_code == 200
+    assert calls == [queries.TOP_PRODUCTS.name, queries.TOP_PRODUCTS_LIVE.name]
+
+
+def test_late_deliveries_picks_the_index_variant_for_the_filters(monkeypatch):
+    calls = []
+
+    async def fake_read_rows(query, **params):
+        calls.append((query.name, params))
+        return [
+            {
+                "department_id": 2,
+                "department_name": "Fitness",
+                "market": "Europe",
+                "late_orders": 3,
+                "total_orders": 4,
+                "late_ratio": 75.0,
+            }
+        ]
+
+    monkeypatch.setattr(analytics_router, "read_rows", fake_read_rows)
+    url = "/analytics/bottlenecks/late-deliveries-by-department"
+
+    assert client.get(url).json()["items"][0]["late_ratio"] == 75.0
+    client.get(url, params={"region": "Western Europe", "market": "Europe"})
+    client.get(url, params={"region": "Western Europe", "shipping_mode": "First Class", "date_from": "2018-01-01"})
+    client.get(url, params={"date_from": "2018-01-01", "shipping_mode": "First Class"})
+
+    assert [name for name, _ in calls] == [
+        queries.LATE_DELIVERIES_BY_DEPARTMENT.name,
+        queries.LATE_DELIVERIES_BY_DEPARTMENT_REGION.name,
+        queries.LATE_DELIVERIES_BY_DEPARTMENT_REGION_SHIPPING.name,
+        queries.LATE_DELIVERIES_BY_DEPARTMENT_DATES.name,
+    ]
+    assert calls[0][1]["market"] is None and calls[0][1]["date_from"] is None
+    assert calls[1][1]["market"] == "Europe"
+    assert calls[2][1]["date_from"] == "2018-01-01" and calls[2][1]["date_to"] is None
+    # the date-range variant gets both bounds
+    assert (calls[3][1]["date_from"], calls[3][1]["date_to"]) == ("2018-01-01", "9999-12-31")
+
+
+def test_late_deliveries_rejects_inverted_date_range():
+    r = client.get(
+        "/analytics/bottlenecks/late-deliveries-by-department",
+        params={"date_from": "2018-02-01", "date_to": "2018-01-01"},
+    )
+    assert r.status_code == 400
+
+
+def test_late_deliveries_series_passes_iso_days_and_bucket(monkeypatch):
+    calls = []
+
+    async def fake_read_rows(query, **params):
+        calls.append((query.name, params))
+        return [
+            {
+                "bucket": "2018-01-01",
+                "total_orders": 4,
+                "late_orders": 1,
+                "late_ratio": 25.0,
+                "avg_shipping_delay_days": 0.5,
+            }
+        ]
+
+    monkeypatch.setattr(analytics_router, "read_rows", fake_read_rows)
+
+    r = client.get(
+        "/analytics/timeseries/late-deliveries",
+        params={"date_from": "2018-01-01", "date_to": "2018-12-31", "bucket": "month"},
+    )
+    assert r.status_code == 200
+    assert r.json()["items"][0]["late_ratio"] == 25.0
+    assert calls == [
+        (
+            queries.LATE_DELIVERIES_SERIES.name,
+            {"date_from": "2018-01-01", "date_to": "2018-12-31", "bucket": "month"},
+        )
+    ]
+
+    assert client.get("/analytics/timeseries/late-deliveries", params={"date_from": "2018-01-01"}).status_code == 422
+    assert (
+        client.get(
+            "/analytics/timeseries/late-deliveries",
+            params={"date_from": "2018-01-01", "date_to": "2018-12-31", "bucket": "year"},
+        ).status_code
+        == 422
+    )
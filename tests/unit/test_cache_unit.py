@@ -0,0 +1,205 @@
+import asyncio
+
+import pytest
+
+from app.database.cache import EntityCache, MemoryBackend
+from app.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _value(counter, *labels):
+    return counter.labels(*labels)._value.get()
+
+
+def _cache(versions, backend=None, clock=None):
+    async def version_source():
+        return versions[-1]
+
+    return EntityCache(
+        version_source=version_source,
+        backend=backend if backend is not None else MemoryBackend(),
+        version_interval=5,
+        enabled=True,
+        clock=clock or Clock(),
+    )
+
+
+def test_memory_backend_evicts_least_recently_used_and_expired():
+    clock = Clock()
+    backend = MemoryBackend(max_entries=2, ttl=10, clock=clock)
+    size_before = _value(CACHE_EVICTIONS, "size")
+    expired_before = _value(CACHE_EVICTIONS, "expired")
+
+    async def scenario():
+        await backend.set("a", {"v": 1})
+        await backend.set("b", {"v": 2})
+        assert await backend.get("a") == {"v": 1}  # a is now the most recent
+        await backend.set("c", {"v": 3})
+        assert await backend.get("b") is None
+        clock.now = 11
+        assert await backend.get("a") is None
+
+    asyncio.run(scenario())
+    assert _value(CACHE_EVICTIONS, "size") - size_before == 1
+    assert _value(CACHE_EVICTIONS, "expired") - expired_before == 1
+
+
+def test_entity_cache_reads_through_and_counts():
+    cache = _cache([1])
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return {"order": {"order_id": 42}}
+
+    hits_before, misses_before = _value(CACHE_HITS, "order"), _value(CACHE_MISSES, "order")
+
+    async def scenario():
+        first = await cache.get("order", 42, load)
+        second = await cache.get("order", 42, load)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {"order": {"order_id": 42}}
+    assert len(loads) == 1
+    assert _value(CACHE_HITS, "order") - hits_before == 1
+    assert _value(CACHE_MISSES, "order") - misses_before == 1
+
+
+def test_entity_cache_does_not_cache_not_found():
+    cache = _cache([1])
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return None
+
+    async def scenario():
+        assert await cache.get("order", 7, load) is None
+        assert await cache.get("order", 7, load) is None
+
+    asyncio.run(scenario())
+    assert len(loads) == 2
+
+
+def test_new_graph_version_invalidates_everything():
+    versions = [1]
+    clock = Clock()
+    backend = MemoryBackend(clock=clock)
+    cache = _cache(versions, backend=backend, clock=clock)
+    loads = []
+
+    async def load():
+        loads.append(versions[-1])
+        return {"product": {"product_id": 7, "version": versions[-1]}}
+
+    async def scenario():
+        await cache.get("product", 7, load)
+        versions.append(2)
+        # still within the version check interval: the known version is used
+        clock.now = 4
+        assert (await cache.get("product", 7, load))["product"]["version"] == 1
+        clock.now = 5
+        assert (await cache.get("product", 7, load))["product"]["version"] == 2
+
+    asyncio.run(scenario())
+    assert loads == [1, 2]
+    assert len(backend) == 1
+
+
+def test_first_version_read_is_shared_by_concurrent_requests():
+    reads = []
+    release = None
+
+    async def version_source():
+        reads.append(1)
+        await release.wait()
+        return "v1"
+
+    cache = EntityCache(version_source=version_source, backend=MemoryBackend(), enabled=True, clock=Clock())
+
+    async def load():
+        return {"product": {"product_id": 7}}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        pending = [asyncio.ensure_future(cache.get("product", 7, load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert not any(task.done() for task in pending)  # nobody served before the version is known
+        release.set()
+        await asyncio.gather(*pending)
+
+    asyncio.run(scenario())
+    assert reads == [1]
+    assert list(cache.backend._entries) == [("v1", "product", "7")]
+
+
+def test_failed_first_version_read_is_retried():
+    attempts = []
+
+    async def version_source():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("neo4j unavailable")
+        return "v1"
+
+    cache = EntityCache(version_source=version_source, backend=MemoryBackend(), enabled=True, clock=Clock())
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.version()
+        assert await cache.version() == "v1"
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+
+
+def test_get_many_only_loads_uncached_ids():
+    cache = _cache(["v"])
+    calls = []
+
+    async def load(ids):
+        calls.append(ids)
+        return {i: ({"product": {"product_id": i}} if i != 9 else None) for i in ids}
+
+    async def scenario():
+        await cache.get_many("product", [1, 2], load)
+        return await cache.get_many("product", [2, 3, 9, 2], load)
+
+    found = asyncio.run(scenario())
+    assert calls == [[1, 2], [3, 9]]
+    assert found[2] == {"product": {"product_id": 2}}
+    assert found[9] is None
+
+
+def test_shared_backend_stand_in():
+    class DictBackend:
+        def __init__(self):
+            self.data, self.cleared = {}, 0
+
+        async def get(self, key):
+            return self.data.get(key)
+
+        async def set(self, key, value):
+            self.data[key] = value
+
+        async def clear(self):
+            self.cleared += 1
+
+    backend = DictBackend()
+    cache = _cache(["v1"], backend=backend)
+
+    async def load():
+        return {"order": {"order_id": 1}}
+
+    asyncio.run(cache.get("order", "1", load))
+    assert backend.data == {("v1", "order", "1"): {"order": {"order_id": 1}}}
+    assert backend.cleared == 1  # first version seen
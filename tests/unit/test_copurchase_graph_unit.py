@@ -0,0 +1,277 @@
+import asyncio
+import itertools
+import math
+import random
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.routers import analytics
+from app.services import copurchase_graph
+from app.services.copurchase_graph import CoPurchaseEngine, CoPurchaseGraph, PathBudgetExceeded
+from app.services.gds_service import GdsUnavailable
+
+client = TestClient(main.app)
+
+#   1 - 2 - 4 - 6
+#   |       |
+#   3 ----- 5        7 (isolated)
+PRODUCTS = [(pid, f"P{pid}") for pid in range(1, 8)]
+EDGES = [(1, 2), (2, 4), (1, 3), (3, 5), (5, 4), (4, 6), (2, 1), (6, 6), (1, 99)]
+
+
+def _graph(version="v1"):
+    sources, targets = zip(*EDGES)
+    return CoPurchaseGraph.from_edges(PRODUCTS, sources, targets, version=version)
+
+
+def _brute_force_shortest(graph, a, b, edges=EDGES, max_hops=5):
+    adjacency = {pid: set() for pid in graph.ids}
+    for u, v in edges:
+        if u in adjacency and v in adjacency and u != v:
+            adjacency[u].add(v)
+            adjacency[v].add(u)
+    paths = [[a]]
+    for _ in range(max_hops):
+        paths = [p + [n] for p in paths for n in adjacency[p[-1]] if n not in p]
+        found = sorted(p for p in paths if p[-1] == b)
+        if found:
+            return found
+    return []
+
+
+def test_csr_is_undirected_and_deduplicated():
+    graph = _graph()
+
+    assert graph.edge_count == 6  # duplicate (2, 1), self loop and unknown product dropped
+    assert graph._neighbors(graph.index[4]) == [graph.index[2], graph.index[5], graph.index[6]]
+    assert graph._neighbors(graph.index[7]) == []
+
+
+def test_paths_match_brute_force_on_every_pair():
+    graph = _graph()
+
+    for a, b in itertools.permutations(graph.ids, 2):
+        expected = _brute_force_shortest(graph, a, b)
+        assert sorted(graph.all_shortest_paths(a, b)) == expected, (a, b)
+        path = graph.shortest_path(a, b)
+        assert (path is None and not expected) or path in expected
+
+
+def test_all_shortest_paths_on_a_random_graph():
+    rng = random.Random(7)
+    products = [(pid, None) for pid in range(30)]
+    edges = [(rng.randrange(30), rng.randrange(30)) for _ in range(55)]
+    sources, targets = zip(*edges)
+    graph = CoPurchaseGraph.from_edges(products, sources, targets)
+
+    for a, b in itertools.permutations(range(30), 2):
+        assert sorted(graph.all_shortest_paths(a, b)) == _brute_force_shortest(graph, a, b, edges), (a, b)
+
+
+def test_max_hops_and_unknown_products():
+    graph = _graph()
+
+    assert graph.shortest_path(1, 6) == [1, 2, 4, 6]
+    assert graph.shortest_path(1, 6, max_hops=2) is None
+    assert graph.shortest_path(1, 42) is None
+    assert graph.shortest_path(1, 1) is None
+    assert graph.describe([1, 2]) == {
+        "products": [{"product_id": 1, "name": "P1"}, {"product_id": 2, "name": "P2"}],
+        "length": 1,
+    }
+
+
+def test_engine_serves_current_snapshot_and_reloads_on_new_version(monkeypatch):
+    versions = ["v1"]
+    loads = []
+
+    async def loader(version):
+        loads.append(version)
+        return _graph(version)
+
+    async def current_version():
+        return versions[-1]
+
+    monkeypatch.setattr(copurchase_graph.entity_cache, "version", current_version)
+    engine = CoPurchaseEngine(enabled=True, loader=loader)
+
+    async def scenario():
+        assert await engine.snapshot() is None  # missing: load scheduled, caller uses Cypher
+        await engine.drain()
+        assert (await engine.snapshot()).version == "v1"
+        versions.append("v2")
+        assert await engine.snapshot() is None  # stale
+        await engine.drain()
+        assert (await engine.snapshot()).version == "v2"
+
+    asyncio.run(scenario())
+    assert loads == ["v1", "v2"]
+
+
+def test_engine_backs_off_after_a_failed_load(monkeypatch):
+    attempts = []
+
+    async def loader(version):
+        attempts.append(version)
+        if len(attempts) == 1:
+            raise RuntimeError("neo4j unavailable")
+        return _graph(version)
+
+    async def current_version():
+        return "v1"
+
+    monkeypatch.setattr(copurchase_graph.entity_cache, "version", current_version)
+    engine = CoPurchaseEngine(enabled=True, loader=loader, retry_seconds=60)
+
+    async def scenario():
+        assert await engine.snapshot() is None
+        await engine.drain()
+        assert await engine.snapshot() is None  # within the backoff: no new load
+        await engine.drain()
+        assert attempts == ["v1"]
+        engine._failed_at -= 61
+        assert await engine.snapshot() is None
+        await engine.drain()
+        assert (await engine.snapshot()).version == "v1"
+
+    asyncio.run(scenario())
+    assert attempts == ["v1", "v1"]
+
+
+def test_path_endpoints_use_the_snapshot(monkeypatch):
+    graph = _graph("test")
+
+    async def snapshot():
+        return graph
+
+    monkeypatch.setattr(copurchase_graph.copurchase_engine, "snapshot", snapshot)
+
+    r = client.get("/analytics/paths/products/shortest", params={"from_id": 1, "to_id": 6})
+    assert r.status_code == 200
+    assert [p["product_id"] for p in r.json()["path"]["products"]] == [1, 2, 4, 6]
+
+    r = client.get("/analytics/paths/products/all-shortest", params={"from_id": 2, "to_id": 3})
+    assert [[p["product_id"] for p in path["products"]] for path in r.json()["paths"]] == [[2, 1, 3]]
+
+    assert client.get("/analytics/paths/products/shortest", params={"from_id": 1, "to_id": 7}).status_code == 404
+
+
+def _brute_force_cheapest(edges, a, b):
+    # Floyd-Warshall over the heaviest of any duplicate edge, cost 1 / w
+    weight = {}
+    for u, v, w in edges:
+        if u != v:
+            key = (min(u, v), max(u, v))
+            weight[key] = max(weight.get(key, 0), w)
+    nodes = {n for key in weight for n in key}
+    dist = {(u, v): math.inf for u in nodes for v in nodes}
+    for (u, v), w in weight.items():
+        dist[u, v] = dist[v, u] = 1 / w
+    for k in nodes:
+        for u in nodes:
+            for v in nodes:
+                if dist[u, k] + dist[k, v] < dist[u, v]:
+                    dist[u, v] = dist[u, k] + dist[k, v]
+    return dist.get((a, b), math.inf)
+
+
+def test_weighted_path_prefers_strong_pairs():
+    # 1 - 2 - 4 is two hops of weight 1; 1 - 3 - 5 - 4 is three hops of weight 10
+    products = [(pid, None) for pid in range(1, 6)]
+    edges = [(1, 2, 1), (2, 4, 1), (1, 3, 10), (3, 5, 10), (5, 4, 10), (3, 1, 2)]
+    sources, targets, weights = zip(*edges)
+    graph = CoPurchaseGraph.from_edges(products, sources, targets, weights=weights)
+
+    assert graph.edge_count == 5  # (3, 1) duplicates (1, 3): the heavier weight is kept
+    path, total = graph.weighted_path(1, 4)
+    assert path == [1, 3, 5, 4]
+    assert total == pytest.approx(0.3)
+    path, total = graph.weighted_path(1, 4, cost="neglog")
+    assert path == [1, 3, 5, 4] and total == pytest.approx(0.0)
+    assert graph.shortest_path(1, 4) == [1, 2, 4]  # hop count still ignores weights
+    assert graph.weighted_path(1, 42) is None
+
+
+def test_weighted_path_matches_brute_force():
+    rng = random.Random(11)
+    edges = [(rng.randrange(25), rng.randrange(25), rng.randint(1, 50)) for _ in range(60)]
+    sources, targets, weights = zip(*edges)
+    graph = CoPurchaseGraph.from_edges([(pid, None) for pid in range(25)], sources, targets, weights=weights)
+
+    for a, b in itertools.permutations(range(25), 2):
+        expected = _brute_force_cheapest(edges, a, b)
+        found = graph.weighted_path(a, b)
+        if expected == math.inf:
+            assert found is None, (a, b)
+        else:
+            assert found[1] == pytest.approx(expected), (a, b)
+
+
+def test_weighted_path_budget():
+    graph = _graph()
+
+    with pytest.raises(PathBudgetExceeded):
+        graph.weighted_path(1, 6, max_expansions=2)
+    assert graph.weighted_path(1, 6, max_expansions=6)[0] == [1, 2, 4, 6]
+
+    # a 200-node chain: the deadline is checked every 64 expansions
+    chain = CoPurchaseGraph.from_edges([(pid, None) for pid in range(200)], range(199), range(1, 200))
+    with pytest.raises(PathBudgetExceeded):
+        chain.weighted_path(0, 199, deadline=time.monotonic() - 1)
+
+
+def test_weighted_endpoint_engines(monkeypatch):
+    graph = _graph("test")
+    gds_calls = []
+
+    async def snapshot():
+        return graph
+
+    async def no_gds(driver, from_id, to_id, cost, budget):
+        gds_calls.append((from_id, to_id, cost, budget))
+        raise GdsUnavailable("There is no procedure with the name `gds.graph.exists`")
+
+    monkeypatch.setattr(analytics, "get_async_driver", lambda: None)
+    monkeypatch.setattr(analytics, "run_weighted_path", no_gds)
+    monkeypatch.setattr(copurchase_graph.copurchase_engine, "snapshot", snapshot)
+    monkeypatch.setattr(copurchase_graph.copurchase_engine, "enabled", True)
+
+    r = client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 6, "budget_ms": 100})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["engine"] == "in-process" and body["cost"] == "inverse"
+    assert [p["product_id"] for p in body["path"]["products"]] == [1, 2, 4, 6]
+    assert body["path"]["total_cost"] == pytest.approx(3.0)
+    assert gds_calls == [(1, 6, "inverse", 0.1)]
+
+    assert client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 7}).status_code == 404
+    assert client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 6, "budget_ms": 1}).status_code == 422
+
+    async def no_snapshot():
+        return None
+
+    monkeypatch.setattr(copurchase_graph.copurchase_engine, "snapshot", no_snapshot)
+    r = client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 6})
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+
+    monkeypatch.setattr(copurchase_graph.copurchase_engine, "enabled", False)
+    r = client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 6})
+    assert r.status_code == 501 and "retry-after" not in r.headers  # engine disabled: not retryable
+    monkeypatch.setattr(copurchase_graph.copurchase_engine, "enabled", True)
+
+    async def gds_path(driver, from_id, to_id, cost, budget):
+        return {"products": [{"product_id": 1, "name": "P1"}, {"product_id": 2, "name": "P2"}], "length": 1, "total_cost": 0.5}
+
+    monkeypatch.setattr(analytics, "run_weighted_path", gds_path)
+    r = client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 2, "cost": "neglog"})
+    assert r.json()["engine"] == "gds" and r.json()["path"]["total_cost"] == 0.5
+
+    async def gds_timeout(driver, from_id, to_id, cost, budget):
+        raise PathBudgetExceeded("latency budget of 250 ms spent in GDS Dijkstra")
+
+    monkeypatch.setattr(analytics, "run_weighted_path", gds_timeout)
+    r = client.get("/analytics/paths/products/weighted", params={"from_id": 1, "to_id": 2})
+    assert r.status_code == 504
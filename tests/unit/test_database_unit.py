@@ -0,0 +1,108 @@
+from app import database
+
+
+class _Tx:
+    def __init__(self, log):
+        self._log = log
+
+    async def run(self, query):
+        self._log.append(query)
+        return self
+
+    async def consume(self):
+        return None
+
+    async def close(self):
+        self._log.append("tx-close")
+
+
+class _Session:
+    def __init__(self, log):
+        self._log = log
+
+    async def begin_transaction(self):
+        return _Tx(self._log)
+
+    async def close(self):
+        self._log.append("session-close")
+
+
+class _Driver:
+    def __init__(self):
+        self.log = []
+
+    def session(self):
+        return _Session(self.log)
+
+
+def test_warm_up_async_pool_holds_transactions_open_together():
+    import asyncio
+
+    driver = _Driver()
+
+    assert asyncio.run(database.warm_up_async_pool(driver, 3)) == 3
+    # all transactions run before any is released, so each needs its own connection
+    assert driver.log == ["RETURN 1"] * 3 + ["tx-close"] * 3 + ["session-close"] * 3
+
+
+def test_driver_config_reads_pool_settings(monkeypatch):
+    monkeypatch.setattr(database, "NEO4J_MAX_POOL_SIZE", 20)
+    monkeypatch.setattr(database, "NEO4J_LIVENESS_CHECK_TIMEOUT", "15")
+
+    config = database.driver_config()
+
+    assert config["max_connection_pool_size"] == 20
+    assert config["liveness_check_timeout"] == 15.0
+
+
+def test_read_helpers_use_managed_read_transactions(monkeypatch, mock_async_driver_factory):
+    import asyncio
+
+    calls = []
+    driver = mock_async_driver_factory(data_rows=[{"n": 1}, {"n": 2}], single_row={"n": 1})
+    session_factory = driver.session
+
+    def _session(**kwargs):
+        calls.append(kwargs)
+        return session_factory(**kwargs)
+
+    monkeypatch.setattr(driver, "session", _session)
+    monkeypatch.setattr(database, "get_async_driver", lambda: driver)
+
+    assert asyncio.run(database.read_rows("MATCH (n) RETURN n", limit=2)) == [{"n": 1}, {"n": 2}]
+    assert asyncio.run(database.read_single("MATCH (n) RETURN n")) == {"n": 1}
+    assert calls == [{"default_access_mode": database.READ_ACCESS}] * 2
+
+
+def test_coerce_id_matches_stored_integer_ids():
+    assert database.coerce_id("42") == 42
+    assert database.coerce_id(" 7 ") == 7
+    assert database.coerce_id("A-42") == "A-42"
+    assert database.coerce_id(42) == 42
+
+
+def test_read_by_id_falls_back_to_string_ids(monkeypatch):
+    import asyncio
+
+    seen = []
+
+    async def _read_single(query, **params):
+        seen.append(params["order_id"])
+        return {"order": {"order_id": "0042"}} if params["order_id"] == "0042" else None
+
+    monkeypatch.setattr(database, "read_single", _read_single)
+
+    assert asyncio.run(database.read_by_id("q", "order_id", "0042")) == {"order": {"order_id": "0042"}}
+    assert seen == [42, "0042"]
+
+
+def test_stream_rows_yields_rows_from_a_read_session(monkeypatch, mock_async_driver_factory):
+    import asyncio
+
+    driver = mock_async_driver_factory(data_rows=[{"n": 1}, {"n": 2}, {"n": 3}])
+    monkeypatch.setattr(database, "get_async_driver", lambda: driver)
+
+    async def _collect():
+        return [row async for row in database.stream_rows("MATCH (n) RETURN n")]
+
+    assert asyncio.run(_collect()) == [{"n": 1}, {"n": 2}, {"n": 3}]
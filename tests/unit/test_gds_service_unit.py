@@ -1,52 +1,61 @@
+import asyncio
+
+import pytest
+
 from app.services import gds_service
+from app.services.copurchase_graph import PathBudgetExceeded
+
+
+async def _graph_name(session, graph_name):
+    return graph_name
 
 
-def test_run_pagerank_success(monkeypatch, mock_driver_factory):
+def test_run_pagerank_success(monkeypatch, mock_async_driver_factory):
     rows = [{"product_id": 1, "name": "A", "score": 0.5}]
-    driver = mock_driver_factory(data_rows=rows)
-    monkeypatch.setattr(gds_service, "ensure_product_graph", lambda session, graph_name: graph_name)
+    driver = mock_async_driver_factory(data_rows=rows)
+    monkeypatch.setattr(gds_service, "ensure_product_graph", _graph_name)
 
-    result = gds_service.run_pagerank(driver=driver, limit=1, graph_name="graph-one")
+    result = asyncio.run(gds_service.run_pagerank(driver=driver, limit=1, graph_name="graph-one"))
 
     assert result["graph"] == "graph-one"
     assert result["limit"] == 1
     assert result["results"] == rows
 
 
-def test_run_pagerank_fallback(monkeypatch, mock_driver_factory):
+def test_run_pagerank_fallback(monkeypatch, mock_async_driver_factory):
     class FakeError(Exception):
         pass
 
     rows = [{"product_id": 2, "name": "B", "score": 3}]
-    driver = mock_driver_factory(data_rows=rows)
+    driver = mock_async_driver_factory(data_rows=rows)
     monkeypatch.setattr(gds_service, "Neo4jError", FakeError)
 
-    def _raise(*_args, **_kwargs):
+    async def _raise(*_args, **_kwargs):
         raise FakeError("no gds")
 
     monkeypatch.setattr(gds_service, "ensure_product_graph", _raise)
 
-    result = gds_service.run_pagerank(driver=driver, limit=2, graph_name="graph-two")
+    result = asyncio.run(gds_service.run_pagerank(driver=driver, limit=2, graph_name="graph-two"))
 
     assert result["graph"] == "graph-two-fallback-degree"
     assert result["results"] == rows
 
 
-def test_run_louvain_success(monkeypatch, mock_driver_factory):
+def test_run_louvain_success(monkeypatch, mock_async_driver_factory):
     rows = [
         {"product_id": 3, "name": "C", "community_id": 10},
         {"product_id": 4, "name": "D", "community_id": 11},
     ]
-    driver = mock_driver_factory(data_rows=rows)
-    monkeypatch.setattr(gds_service, "ensure_product_graph", lambda session, graph_name: graph_name)
+    driver = mock_async_driver_factory(data_rows=rows)
+    monkeypatch.setattr(gds_service, "ensure_product_graph", _graph_name)
 
-    result = gds_service.run_louvain(driver=driver, limit=2, graph_name="graph-three")
+    result = asyncio.run(gds_service.run_louvain(driver=driver, limit=2, graph_name="graph-three"))
 
     assert result["graph"] == "graph-three"
     assert result["results"] == rows
 
 
-def test_run_louvain_fallback(monkeypatch, mock_driver_factory):
+def test_run_louvain_fallback(monkeypatch, mock_async_driver_factory):
     class FakeError(Exception):
         pass
 
@@ -54,15 +63,106 @@ def test_run_louvain_fallback(monkeypatch, mock_driver_factory):
         {"product_id": 5, "name": "E", "community_id": 5},
         {"product_id": 6, "name": "F", "community_id": 6},
     ]
-    driver = mock_driver_factory(data_rows=rows)
+    driver = mock_async_driver_factory(data_rows=rows)
     monkeypatch.setattr(gds_service, "Neo4jError", FakeError)
 
-    def _raise(*_args, **_kwargs):
+    async def _raise(*_args, **_kwargs):
         raise FakeError("no gds")
 
     monkeypatch.setattr(gds_service, "ensure_product_graph", _raise)
 
-    result = gds_service.run_louvain(driver=driver, limit=2, graph_name="graph-four")
+    result = asyncio.run(gds_service.run_louvain(driver=driver, limit=2, graph_name="graph-four"))
 
     assert result["graph"] == "graph-four-fallback-community"
     assert result["results"] == rows
+
+
+def test_run_weighted_path_success(monkeypatch, mock_async_driver_factory):
+    record = {"products": [{"product_id": 1, "name": "A"}, {"product_id": 2, "name": "B"}], "length": 1, "total_cost": 0.25}
+    driver = mock_async_driver_factory(single_row=record)
+    projected = []
+
+    async def ensure(tx, graph_name):
+        projected.append(graph_name)
+        return graph_name
+
+    monkeypatch.setattr(gds_service, "ensure_cost_graph", ensure)
+    monkeypatch.setattr(gds_service, "gds_availability", gds_service.GdsAvailability())
+
+    result = asyncio.run(gds_service.run_weighted_path(driver=driver, from_id=1, to_id=2, budget=0.2))
+
+    assert result == record
+    # one projection per graph version (pinned to "test" in conftest)
+    assert projected == ["productCopurchaseCost-test"]
+
+
+@pytest.mark.parametrize(
+    "code, expected, remembered",
+    [
+        ("Neo.ClientError.Transaction.TransactionTimedOutClientConfiguration", PathBudgetExceeded, False),
+        ("Neo.ClientError.Procedure.ProcedureNotFound", gds_service.GdsUnavailable, True),
+        ("Neo.ClientError.Procedure.ProcedureCallFailed", gds_service.GdsUnavailable, False),
+    ],
+)
+def test_run_weighted_path_errors(monkeypatch, mock_async_driver_factory, code, expected, remembered):
+    class FakeError(Exception):
+        def __init__(self, code):
+            super().__init__(code)
+            self.code = code
+
+    calls = []
+    driver = mock_async_driver_factory()
+    monkeypatch.setattr(gds_service, "Neo4jError", FakeError)
+    monkeypatch.setattr(gds_service, "gds_availability", gds_service.GdsAvailability(retry_interval=60))
+
+    async def _raise(*_args, **_kwargs):
+        calls.append(code)
+        raise FakeError(code)
+
+    monkeypatch.setattr(gds_service, "ensure_cost_graph", _raise)
+
+    for _ in range(2):
+        with pytest.raises(expected if not remembered else gds_service.GdsUnavailable):
+            asyncio.run(gds_service.run_weighted_path(driver=driver, from_id=1, to_id=2))
+
+    # a missing plugin is not asked for again within the retry interval
+    assert len(calls) == (1 if remembered else 2)
+
+
+def test_gds_availability_retry_interval():
+    now = [0.0]
+    availability = gds_service.GdsAvailability(retry_interval=60, clock=lambda: now[0])
+
+    availability.mark_missing()
+    now[0] = 59
+    assert not availability.available()
+    now[0] = 60
+    assert availability.available()
+
+
+def test_ensure_cost_graph_drops_earlier_versions():
+    sent = []
+
+    class FakeResult:
+        async def single(self):
+            return {"exists": False, "dropped": []}
+
+        async def data(self):
+            return []
+
+        async def consume(self):
+            return None
+
+    class FakeTx:
+        async def run(self, text, params):
+            sent.append(params)
+            return FakeResult()
+
+    name = asyncio.run(gds_service.ensure_cost_graph(FakeTx(), gds_service.cost_graph_name(42)))
+
+    assert name == "productCopurchaseCost-42"
+    assert sent == [
+        {"name": "productCopurchaseCost-42"},  # exists?
+        {"name": "productCopurchaseCost-42"},  # project
+        {"prefix": "productCopurchaseCost-", "name": "productCopurchaseCost-42"},  # drop older versions
+    ]
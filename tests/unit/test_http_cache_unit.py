@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.database import entity_cache
+from app.routers import analytics as analytics_router
+from app.services.http_cache import etag_matches, make_etag
+
+client = TestClient(main.app)
+
+
+def test_make_etag_depends_on_version_and_params_only():
+    etag = make_etag("0.1.0", 1700000000000, "/gds/pagerank", query=[("limit", "10")])
+
+    assert etag.startswith('W/"')
+    assert etag == make_etag("0.1.0", 1700000000000, "/gds/pagerank", query=[("limit", "10")])
+    assert etag != make_etag("0.1.0", 1700000000001, "/gds/pagerank", query=[("limit", "10")])
+    assert etag != make_etag("0.1.0", 1700000000000, "/gds/pagerank", query=[("limit", "20")])
+    # parameter order does not matter
+    assert make_etag("v", query=[("a", "1"), ("b", "2")]) == make_etag("v", query=[("b", "2"), ("a", "1")])
+
+
+def test_etag_matches_weak_comparison_lists_and_star():
+    etag = 'W/"abc"'
+
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abd"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_top_products_answers_304_without_querying(monkeypatch):
+    calls = []
+
+    async def fake_read_rows(query, **params):
+        calls.append(params)
+        return [{"product_id": 1, "name": "Widget", "times_ordered": 3, "total_quantity": 5}]
+
+    monkeypatch.setattr(analytics_router, "read_rows", fake_read_rows)
+
+    first = client.get("/analytics/top-products?limit=1")
+    assert first.status_code == 200
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    etag = first.headers["etag"]
+
+    second = client.get("/analytics/top-products?limit=1", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    assert len(calls) == 1
+
+    # a new graph version changes the ETag: full response again
+    async def reseeded():
+        return "reseeded"
+
+    monkeypatch.setattr(entity_cache, "version", reseeded)
+    third = client.get("/analytics/top-products?limit=1", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+    assert len(calls) == 2
@@ -14,3 +14,23 @@ def test_llm_valueerror_becomes_400(monkeypatch):
     r = client.post("/llm/query", json={"question": "show me something"})
     assert r.status_code == 400
     assert "unsafe cypher" in r.text
+
+
+def test_llm_templates_run_as_named_queries(monkeypatch, mock_async_driver_factory):
+    # named, not "adhoc": per-query metrics and the slow query log can see them
+    import asyncio
+
+    from app import database
+    from app.database import queries
+    from app.services import llm_service
+
+    observed = []
+    monkeypatch.setattr(database, "observe_query", lambda name, *args, **kwargs: observed.append(name))
+    monkeypatch.setattr(database.slow_query_log, "observe", lambda query, *args: observed.append(query))
+    monkeypatch.setattr(llm_service, "groq_interpret", lambda *args: "")
+    session = mock_async_driver_factory(data_rows=[{"product_id": 2, "name": "B", "score": 3}]).session()
+
+    result = asyncio.run(llm_service.run_llm_query(session, "recommend 5 similar to product_id 365"))
+
+    assert observed == ["llm.recommend_2hop", queries.LLM_RECOMMEND_2HOP]
+    assert result["cypher"] == queries.LLM_RECOMMEND_2HOP.text
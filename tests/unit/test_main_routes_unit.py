@@ -17,11 +17,66 @@ def test_ping_route():
     assert resp.json()["status"] == "ok"
 
 
-def test_health_route(monkeypatch, mock_driver_factory):
-    driver = mock_driver_factory(single_row={"ok": 1})
-    monkeypatch.setattr(main, "get_driver", lambda: driver)
+def test_health_route(monkeypatch, mock_async_driver_factory):
+    driver = mock_async_driver_factory(single_row={"ok": 1})
+    monkeypatch.setattr(main, "get_async_driver", lambda: driver)
 
     client = TestClient(main.app)
     resp = client.get("/health")
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok", "neo4j": 1}
+
+
+def test_lifespan_warms_up_and_closes_driver(monkeypatch):
+    events = []
+
+    class LifespanDriver:
+        async def verify_connectivity(self):
+            events.append("verify")
+
+    async def _warm_up(driver, connections):
+        events.append("warm-up")
+        return connections
+
+    async def _close():
+        events.append("close")
+
+    monkeypatch.setattr(main, "get_async_driver", LifespanDriver)
+    async def _plan(driver):
+        events.append("plan")
+        return {"planned": [], "skipped": [], "warnings": []}
+
+    monkeypatch.setattr(main, "warm_up_async_pool", _warm_up)
+    monkeypatch.setattr(main, "warm_up_queries", _plan)
+    monkeypatch.setattr(main, "close_async_driver", _close)
+    monkeypatch.setattr(main, "close_driver", lambda: None)
+
+    with TestClient(main.app) as client:
+        assert events == ["verify", "warm-up", "plan"]
+        assert client.get("/ping").status_code == 200
+    assert events[-1] == "close"
+
+
+def test_lifespan_starts_without_neo4j(monkeypatch):
+    def _unreachable():
+        raise OSError("connection refused")
+
+    async def _close():
+        return None
+
+    monkeypatch.setattr(main, "get_async_driver", _unreachable)
+    monkeypatch.setattr(main, "close_async_driver", _close)
+    monkeypatch.setattr(main, "close_driver", lambda: None)
+
+    with TestClient(main.app) as client:
+        assert client.get("/ping").status_code == 200
+
+
+def test_metrics_route_exposes_http_latency_by_route_template():
+    client = TestClient(main.app)
+    client.get("/ping")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/ping",status="200"}' in resp.text
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from prometheus_client import REGISTRY
+
+from app import database
+from app.database import queries
+
+
+class _Summary:
+    result_available_after = 12
+    result_consumed_after = 30
+
+
+def _sample(name, query):
+    return REGISTRY.get_sample_value(name, {"query": query}) or 0
+
+
+class _Result:
+    async def data(self):
+        return [{"product_id": 1}, {"product_id": 2}]
+
+    async def consume(self):
+        return _Summary()
+
+
+def test_fetch_rows_records_latency_rows_and_server_timings(mock_async_driver_factory):
+    driver = mock_async_driver_factory(side_effect=lambda *_a, **_k: _Result())
+    before_count = _sample("neo4j_query_seconds_count", "analytics.top_products")
+    before_rows = _sample("neo4j_query_rows_sum", "analytics.top_products")
+    before_server = _sample("neo4j_query_result_consumed_after_seconds_sum", "analytics.top_products")
+
+    rows = asyncio.run(database.fetch_rows(driver.session(), queries.TOP_PRODUCTS, {"limit": 2}))
+
+    assert len(rows) == 2
+    assert _sample("neo4j_query_seconds_count", "analytics.top_products") == before_count + 1
+    assert _sample("neo4j_query_rows_sum", "analytics.top_products") == before_rows + 2
+    assert _sample("neo4j_query_result_consumed_after_seconds_sum", "analytics.top_products") == pytest.approx(before_server + 0.03)
+
+
+def test_fetch_single_counts_errors_by_type(mock_async_driver_factory):
+    driver = mock_async_driver_factory(side_effect=lambda *_a, **_k: ValueError("boom"))
+    labels = {"query": "orders.details", "error": "ValueError"}
+    before = REGISTRY.get_sample_value("neo4j_query_errors_total", labels) or 0
+
+    try:
+        asyncio.run(database.fetch_single(driver.session(), queries.ORDER_DETAILS, {"order_id": "1"}))
+    except ValueError:
+        pass
+
+    assert REGISTRY.get_sample_value("neo4j_query_errors_total", labels) == before + 1
@@ -9,19 +9,23 @@ class FakeResult:
         self._record = record
         self._records = records or []
 
-    def single(self):
+    async def single(self):
         return self._record
 
-    def data(self):
+    async def data(self):
         return self._records
 
+    async def consume(self):
+        return None
+
 class FakeSession:
-    def __enter__(self): return self
-    def __exit__(self, exc_type, exc, tb): return False
+    async def __aenter__(self): return self
+    async def __aexit__(self, exc_type, exc, tb): return False
 
-    def run(self, query, **params):
+    async def run(self, query, parameters=None, **params):
+        params = {**(parameters or {}), **params}
         # Adjust the "if" checks to match the queries in app/routers/orders.py
-        if "MATCH (o:Order" in query and "RETURN properties(o) AS order" in query:
+        if "MATCH (o:Order" in query and "AS order" in query:
             return FakeResult(record={
                 "order": {"order_id": params.get("order_id", 1)},
                 "customer": {"customer_id": 10},
@@ -29,13 +33,16 @@ class FakeSession:
             })
         return FakeResult(record=None, records=[])
 
+    async def execute_read(self, fn, *args, **kwargs):
+        return await fn(self, *args, **kwargs)
+
 class FakeDriver:
-    def session(self):
+    def session(self, **kwargs):
         return FakeSession()
 
 def test_orders_endpoint_unit(monkeypatch):
-    # override the global driver used by get_driver()
-    monkeypatch.setattr(database_module, "_driver", FakeDriver())
+    # override the global driver used by get_async_driver()
+    monkeypatch.setattr(database_module, "_async_driver", FakeDriver())
 
     r = client.get("/orders/1")
     assert r.status_code == 200
@@ -43,3 +50,30 @@ def test_orders_endpoint_unit(monkeypatch):
     assert "order" in body
     assert "customer" in body
     assert "products" in body
+
+
+def test_orders_batch_keeps_request_order_and_marks_missing(monkeypatch):
+    calls = []
+
+    async def fake_read_rows(query, **params):
+        calls.append(params["ids"])
+        return [
+            {"id": i, "order": {"order_id": i}, "customer": None, "products": []}
+            for i in params["ids"]
+            if i in (1, 3)
+        ]
+
+    monkeypatch.setattr(database_module, "read_rows", fake_read_rows)
+
+    r = client.post("/orders/batch", json={"ids": [3, "1", 2, 3]})
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [(item["id"], item["found"]) for item in items] == [(3, True), ("1", True), (2, False), (3, True)]
+    assert items[1]["result"]["order"]["order_id"] == 1
+    assert items[2]["result"] is None
+    # one UNWIND for the distinct ids, no string retry needed for "1"
+    assert calls == [[3, 1, 2]]
+
+
+def test_orders_batch_rejects_empty_list():
+    assert client.post("/orders/batch", json={"ids": []}).status_code == 422
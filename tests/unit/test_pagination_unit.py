@@ -0,0 +1,19 @@
+import pytest
+
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"date": "2018-01-31T22:56", "id": 20})
+    assert "=" not in cursor
+    assert decode_cursor(cursor, ("date", "id")) == {"date": "2018-01-31T22:56", "id": 20}
+
+
+def test_missing_cursor_means_first_page():
+    assert decode_cursor(None, ("id",)) == {"id": None}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor({"id": 1})])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, ("date", "id"))
@@ -0,0 +1,123 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app import database as database_module
+from app.main import app
+from app.routers import products as products_router
+
+client = TestClient(app)
+
+
+def test_products_batch_retries_unmatched_ids_as_strings(monkeypatch):
+    calls = []
+
+    async def fake_read_rows(query, **params):
+        calls.append(params["ids"])
+        # product "0042" was stored with a string id
+        return [
+            {"id": i, "product": {"product_id": 7 if i == 7 else None, "name": str(i)}, "orders": [], "customers": []}
+            for i in params["ids"]
+            if i in (7, "0042")
+        ]
+
+    monkeypatch.setattr(database_module, "read_rows", fake_read_rows)
+
+    r = client.post("/products/batch", json={"ids": ["0042", 7, 8]})
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [(item["id"], item["found"]) for item in items] == [("0042", True), (7, True), (8, False)]
+    assert items[0]["result"]["product"]["name"] == "0042"
+    assert calls == [[42, 7, 8], ["0042"]]
+
+
+def _order(order_id, date):
+    return {"order_id": order_id, "order_date": date}
+
+
+def test_product_orders_pages_with_keyset_cursor(monkeypatch):
+    calls = []
+
+    async def fake_read_single(query, **params):
+        calls.append(params)
+        orders = [_order(30, "2018-02-01T10:00Z"), _order(20, "2018-01-31T22:56Z"), _order(10, "2018-01-31T22:56Z")]
+        if params["after_id"] is not None:
+            orders = [o for o in orders if (o["order_date"], o["order_id"]) < (params["after_date"], params["after_id"])]
+        return {"product_id": 7, "orders": orders[: params["limit"]]}
+
+    monkeypatch.setattr(database_module, "read_single", fake_read_single)
+
+    first = client.get("/products/7/orders?limit=2").json()
+    assert [o["order_id"] for o in first["items"]] == [30, 20]
+    assert first["next_cursor"]
+    assert calls[0]["limit"] == 3 and calls[0]["after_date"] is None and calls[0]["product_id"] == 7
+
+    second = client.get(f"/products/7/orders?limit=2&cursor={first['next_cursor']}").json()
+    assert [o["order_id"] for o in second["items"]] == [10]
+    assert second["next_cursor"] is None
+    assert (calls[1]["after_date"], calls[1]["after_id"]) == ("2018-01-31T22:56Z", 20)
+    # existence and page come from the one query
+    assert len(calls) == 2
+
+
+def test_product_orders_rejects_bad_cursor_and_unknown_product(monkeypatch):
+    async def fake_read_single(query, **params):
+        return None
+
+    monkeypatch.setattr(database_module, "read_single", fake_read_single)
+
+    assert client.get("/products/7/orders?cursor=not-a-cursor").status_code == 400
+    assert client.get("/products/7/orders").status_code == 404
+    assert client.get("/products/7/customers").status_code == 404
+
+
+def test_product_details_are_capped_to_the_first_pages(monkeypatch):
+    from app.database import queries
+
+    limit = queries.PRODUCT_DETAILS_LIMIT
+
+    async def fake_read_single(query, **params):
+        assert query.name == "products.details"
+        return {
+            "product": {"product_id": 7, "name": "Widget"},
+            "orders": [_order(i, None) for i in range(limit + 1, 0, -1)],
+            "customers": [{"customer_id": i} for i in range(3)],
+        }
+
+    monkeypatch.setattr(database_module, "read_single", fake_read_single)
+
+    body = client.get("/products/7").json()
+    assert len(body["orders"]) == limit
+    assert body["customers_next_cursor"] is None
+
+    page = {}
+
+    async def fake_page(query, **params):
+        page.update(params)
+        return {"product_id": 7, "orders": []}
+
+    monkeypatch.setattr(database_module, "read_single", fake_page)
+    client.get(f"/products/7/orders?cursor={body['orders_next_cursor']}")
+    assert (page["after_date"], page["after_id"]) == (None, 2)
+
+
+def test_product_stream_yields_ndjson_lines(monkeypatch):
+    async def fake_read_single(query, **params):
+        return {"product": {"product_id": 7, "name": "Widget", "price": 1.5}}
+
+    async def fake_stream_rows(query, **params):
+        if query.name == "products.orders_stream":
+            for order_id in (1, 2):
+                yield {"order": _order(order_id, None)}
+        else:
+            yield {"customer": {"customer_id": 5}}
+
+    monkeypatch.setattr(database_module, "read_single", fake_read_single)
+    monkeypatch.setattr(products_router, "stream_rows", fake_stream_rows)
+
+    r = client.get("/products/7/stream")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["type"] for line in lines] == ["product", "order", "order", "customer"]
+    assert lines[2]["data"]["order_id"] == 2
@@ -0,0 +1,93 @@
+import asyncio
+import re
+
+import pytest
+from neo4j import NotificationSeverity
+from neo4j.exceptions import ClientError
+
+from app import database
+from app.database import queries
+from app.services import llm_service
+
+
+def test_every_registered_query_has_sample_parameters():
+    for query in queries.QUERIES.values():
+        used = set(re.findall(r"\$(\w+)", query.text))
+        assert used <= set(query.params), f"{query.name} is missing sample params {used - set(query.params)}"
+
+
+def test_required_queries_have_no_index_hints():
+    # a hinted index that does not exist yet (empty database) fails planning, and
+    # warm-up then refuses to start the API: assert index use in tests/api instead
+    for query in queries.QUERIES.values():
+        if not query.optional:
+            assert "USING INDEX" not in query.text, query.name
+
+
+def test_register_rejects_duplicate_names():
+    with pytest.raises(ValueError):
+        queries.register("orders.details", "RETURN 1")
+
+
+def test_llm_templates_are_registry_aliases():
+    assert llm_service.CYPHER_COPURCHASE == queries.LLM_COPURCHASE.text
+    assert llm_service.CYPHER_CONNECTION == queries.get_query("llm.connection").text
+
+
+class _Status:
+    is_notification = True
+    severity = NotificationSeverity.WARNING
+    gql_status = "01N50"
+    status_description = "warn: label does not exist. The label `Order` does not exist"
+
+
+class _Summary:
+    def __init__(self, statuses):
+        self.gql_status_objects = statuses
+
+
+def _planning_driver(mock_async_driver_factory, failing=(), warning=()):
+    def _explain(cypher, params):
+        text = cypher.removeprefix("EXPLAIN ")
+        if text in failing:
+            raise ClientError("Invalid input")
+        statuses = [_Status()] if text in warning else []
+
+        class _Result:
+            async def consume(self):
+                return _Summary(statuses)
+
+        return _Result()
+
+    return mock_async_driver_factory(side_effect=_explain)
+
+
+def test_warm_up_queries_explains_every_query(mock_async_driver_factory):
+    driver = _planning_driver(mock_async_driver_factory)
+
+    report = asyncio.run(database.warm_up_queries(driver))
+
+    assert report["planned"] == list(queries.QUERIES)
+    assert report["warnings"] == []
+
+
+def test_warm_up_queries_fails_fast_on_broken_query(mock_async_driver_factory):
+    driver = _planning_driver(mock_async_driver_factory, failing={queries.TOP_PRODUCTS.text})
+
+    with pytest.raises(database.QueryWarmupError, match="analytics.top_products"):
+        asyncio.run(database.warm_up_queries(driver))
+
+
+def test_warm_up_queries_skips_optional_and_reports_drift(mock_async_driver_factory):
+    driver = _planning_driver(
+        mock_async_driver_factory,
+        failing={queries.PAGERANK_STREAM.text},
+        warning={queries.ORDER_DETAILS.text},
+    )
+
+    report = asyncio.run(database.warm_up_queries(driver, strict=False))
+    assert report["skipped"] == ["gds.pagerank_stream"]
+    assert [name for name, _, _ in report["warnings"]] == ["orders.details"]
+
+    with pytest.raises(database.QueryWarmupError, match="orders.details"):
+        asyncio.run(database.warm_up_queries(driver, strict=True))
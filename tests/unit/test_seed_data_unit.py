@@ -0,0 +1,366 @@
+import os
+
+import pandas as pd
+import pytest
+
+from scripts import seed_data
+
+
+def _csv_rows():
+    return pd.DataFrame(
+        {
+            "Customer Id": [1, 2],
+            "Customer Fname": ["Ann", None],
+            "Product Card Id": [10, 11],
+            "Order Item Product Price": [9.5, None],
+            "Category Id": [100, 100],
+            "Department Id": [7, 7],
+            "Order Id": [1000, 1001],
+            "Late_delivery_risk": [1, None],
+            "Order Item Id": [1, 2],
+        }
+    )
+
+
+def test_build_record_frame_casts_and_fills_defaults():
+    frame = seed_data.build_record_frame(_csv_rows())
+
+    assert frame["product_price"].tolist() == [9.5, 0.0]
+    assert frame["late_risk"].tolist() == [1, 0]
+    # columns missing from the CSV fall back to their defaults
+    assert frame["quantity"].tolist() == [1, 1]
+    assert frame["market"].tolist() == [None, None]
+    # missing strings become None instead of NaN
+    assert frame["first_name"].tolist() == ["Ann", None]
+
+
+def test_build_record_frame_requires_id_columns():
+    df = _csv_rows().drop(columns=["Order Id"])
+    try:
+        seed_data.build_record_frame(df)
+    except KeyError as e:
+        assert "Order Id" in str(e)
+    else:
+        raise AssertionError("expected KeyError")
+
+
+def test_iter_record_batches_yields_plain_python_rows():
+    frame = seed_data.build_record_frame(_csv_rows())
+    batches = list(seed_data.iter_record_batches(frame, batch_size=1))
+
+    assert [len(b) for b in batches] == [1, 1]
+    first = batches[0][0]
+    assert first["customer_id"] == 1 and type(first["customer_id"]) is int
+    assert first["order_id"] == 1000
+    assert first["product_price"] == 9.5
+
+
+def test_partition_rounds_never_share_endpoints_within_a_round():
+    frame = pd.DataFrame(
+        {
+            "order_id": list(range(200)),
+            # a few very hot products
+            "product_id": [i % 3 if i % 2 else i for i in range(200)],
+        }
+    )
+    rounds = seed_data.partition_rounds(frame, "order_id", "product_id", partitions=4)
+
+    assert len(rounds) == 4
+    assert sum(len(cell) for cells in rounds for cell in cells) == len(frame)
+    for cells in rounds:
+        starts = [set(cell["order_id"]) for cell in cells]
+        ends = [set(cell["product_id"]) for cell in cells]
+        for i, cell_starts in enumerate(starts):
+            for j in range(i + 1, len(cells)):
+                assert not cell_starts & starts[j]
+                assert not ends[i] & ends[j]
+
+
+@pytest.mark.parametrize("partitions", [4, 5, 8])
+def test_symmetric_partition_rounds_never_share_a_product_within_a_round(partitions):
+    # co-purchase pairs: both endpoints are Products, hashed with the same function
+    pairs = pd.DataFrame(
+        [(p1, p2) for p1 in range(40) for p2 in range(p1 + 1, 40) if (p1 * p2) % 3], columns=["p1", "p2"]
+    )
+    rounds = seed_data.symmetric_partition_rounds(pairs, "p1", "p2", partitions)
+
+    assert sum(len(cell) for cells in rounds for cell in cells) == len(pairs)
+    for cells in rounds:
+        products = [set(cell["p1"]) | set(cell["p2"]) for cell in cells]
+        for i in range(len(products)):
+            for j in range(i + 1, len(products)):
+                assert not products[i] & products[j]
+
+
+class _RecordingSession:
+    def __init__(self, calls):
+        self._calls = calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def run(self, query, **params):
+        self._calls.append((query, params["rows"]))
+        return self
+
+    def consume(self):
+        return None
+
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+
+class _RecordingDriver:
+    def __init__(self):
+        self.calls = []
+
+    def session(self):
+        return _RecordingSession(self.calls)
+
+
+def test_seed_graph_phased_writes_deduplicated_nodes_before_relationships(monkeypatch, capsys):
+    fake = _RecordingDriver()
+    monkeypatch.setattr(seed_data, "driver", fake)
+
+    df = pd.DataFrame(
+        {
+            "Customer Id": [1, 1, 2],
+            "Product Card Id": [10, 11, 10],
+            "Category Id": [100, 100, 100],
+            "Department Id": [7, 7, 7],
+            "Order Id": [1000, 1000, 1001],
+            "Order Item Id": [1, 2, 3],
+        }
+    )
+    seed_data.seed_graph_phased(df, batch_size=2, workers=2)
+
+    def rows_for(fragment):
+        return [row for query, rows in fake.calls if fragment in query for row in rows]
+
+    assert sorted(r["customer_id"] for r in rows_for("MERGE (c:Customer")) == [1, 2]
+    assert sorted(r["product_id"] for r in rows_for("MERGE (p:Product")) == [10, 11]
+    assert len(rows_for("MERGE (cat:Category")) == 1
+    assert len(rows_for("MERGE (c)-[:PLACED]->(o)")) == 2
+    assert len(rows_for("MERGE (o)-[r:CONTAINS]->(p)")) == 3
+    assert len(rows_for("MERGE (p)-[:IN_CATEGORY]->(cat)")) == 2
+
+    first_rel = next(i for i, (query, _) in enumerate(fake.calls) if "MATCH" in query)
+    assert all("MATCH" not in query for query, _ in fake.calls[:first_rel])
+    # the default loader reports iterrows vs columnar record building too
+    assert "Record building on 3 rows" in capsys.readouterr().out
+
+
+def test_select_new_orders_filters_on_watermark():
+    df = pd.DataFrame({"Order Id": [1, 2, 2, 3]})
+
+    assert len(seed_data.select_new_orders(df, None)) == 4
+    assert seed_data.select_new_orders(df, {"max_order_id": 2})["Order Id"].tolist() == [3]
+
+
+def test_seed_incremental_skips_unchanged_file(monkeypatch, tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text("Order Id\n1\n")
+    checksum = seed_data.file_checksum(str(path))
+
+    monkeypatch.setattr(seed_data, "read_watermark", lambda source: {"checksum": checksum, "max_order_id": 1})
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("should not reload an unchanged file")
+
+    monkeypatch.setattr(seed_data, "load_csv", _fail)
+    seed_data.seed_incremental(str(path))
+
+
+def test_seed_incremental_with_no_new_orders_only_stores_the_checksum(monkeypatch, tmp_path):
+    path = tmp_path / "orders.csv"
+    _csv_rows().to_csv(path, index=False)
+    stored = []
+
+    monkeypatch.setattr(seed_data, "read_watermark", lambda source: {"checksum": "old", "max_order_id": 1001, "rows": 2})
+    monkeypatch.setattr(seed_data, "write_watermark", lambda *args: stored.append(args))
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("nothing to ingest")
+
+    monkeypatch.setattr(seed_data, "seed_graph_phased", _fail)
+    monkeypatch.setattr(seed_data, "refresh_product_counters", _fail)
+
+    assert seed_data.seed_incremental(str(path), use_cache=False) is False
+    assert stored == [("orders.csv", seed_data.file_checksum(str(path)), {"max_order_id": 1001, "max_order_date": None, "rows": 2})]
+
+
+def test_count_copurchase_pairs_counts_orders_per_pair():
+    df = pd.DataFrame(
+        {
+            "Order Id": [1, 1, 1, 2, 2, 3, 3],
+            # order 3 holds product 10 twice: counted once
+            "Product Card Id": [10, 20, 30, 20, 10, 10, 10],
+        }
+    )
+    pairs = seed_data.count_copurchase_pairs(df)
+
+    weights = {(r.p1, r.p2): r.weight for r in pairs.itertuples()}
+    assert weights == {(10, 20): 2, (10, 30): 1, (20, 30): 1}
+
+
+def test_build_copurchase_relationships_runs_in_bounded_transactions(monkeypatch):
+    sent = []
+
+    class _Session(_RecordingSession):
+        def run(self, query, **params):
+            sent.append((query, params))
+            return self
+
+    class _Driver:
+        def session(self):
+            return _Session([])
+
+    monkeypatch.setattr(seed_data, "driver", _Driver())
+
+    seed_data.build_copurchase_relationships()
+    seed_data.add_copurchase_deltas(1000)
+
+    # full rebuild: batched delete, then the pairs of every order; delta: newer orders only
+    assert [params for _, params in sent] == [{}, {"after": None}, {"after": 1000}]
+    assert sent[0][0] == seed_data.COPURCHASE_DELETE
+    assert all("IN TRANSACTIONS" in query for query, _ in sent)
+
+
+def test_emit_import_csv_writes_admin_import_headers(tmp_path):
+    seed_data.emit_import_csv(_csv_rows(), str(tmp_path))
+
+    customers = pd.read_csv(tmp_path / "customers.csv")
+    assert customers.columns[0] == "customer_id:ID(Customer)"
+    assert customers["customer_id:ID(Customer)"].tolist() == [1, 2]
+
+    categories = pd.read_csv(tmp_path / "categories.csv")
+    assert len(categories) == 1
+
+    contains = pd.read_csv(tmp_path / "contains.csv")
+    assert list(contains.columns[:2]) == [":START_ID(Order)", ":END_ID(Product)"]
+    assert (tmp_path / "co_purchased_with.csv").exists()
+
+
+def test_seed_graph_streaming_writes_every_row_through_the_queue(monkeypatch, tmp_path):
+    fake = _RecordingDriver()
+    monkeypatch.setattr(seed_data, "driver", fake)
+
+    path = tmp_path / "orders.csv"
+    _csv_rows().assign(**{"Order Id": [1000, 1003]}).to_csv(path, index=False)
+
+    state = seed_data.seed_graph_streaming(str(path), batch_size=1, workers=2, chunk_size=1, queue_size=1)
+
+    written = sorted(row["order_id"] for _, rows in fake.calls for row in rows)
+    assert written == [1000, 1003]
+    assert state["rows"] == 2
+    assert state["max_order_id"] == 1003
+
+
+def test_load_csv_reuses_parquet_cache_until_the_source_changes(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "orders.csv"
+    _csv_rows().to_csv(path, index=False)
+
+    first = seed_data.load_csv(str(path), columns=["Order Id", "Customer Id"])
+    assert seed_data.valid_cache(str(path)) == f"{path}.parquet"
+
+    cached = seed_data.load_csv(str(path), columns=["Order Id", "Customer Id", "Not In File"])
+    assert cached.equals(first)
+
+    with open(path, "a", encoding="latin1") as f:
+        f.write("3,,12,1.0,100,7,1002,0,3\n")
+    assert seed_data.valid_cache(str(path)) is None
+    assert len(seed_data.load_csv(str(path))) == 3
+
+
+def test_parse_cache_hashes_once_and_remembers_a_touched_file(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "orders.csv"
+    _csv_rows().to_csv(path, index=False)
+    hashed = []
+    sha256 = seed_data._sha256
+    monkeypatch.setattr(seed_data, "_sha256", lambda p: hashed.append(p) or sha256(p))
+
+    checksum = seed_data.file_checksum(str(path))
+    seed_data.load_csv(str(path), checksum=checksum)
+    assert len(hashed) == 1  # the checksum is passed through to the cache meta
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert seed_data.valid_cache(str(path)) == f"{path}.parquet"
+    assert len(hashed) == 2
+    assert seed_data.valid_cache(str(path)) == f"{path}.parquet"
+    assert seed_data.file_checksum(str(path)) == checksum
+    assert len(hashed) == 2  # the new mtime was stored
+
+
+def test_failed_parse_cache_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / "orders.csv"
+    _csv_rows().to_csv(path, index=False)
+
+    def broken_to_parquet(self, target, **kwargs):
+        with open(target, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", broken_to_parquet)
+    seed_data.write_cache(str(path), _csv_rows())
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["orders.csv"]
+
+
+def test_adaptive_batch_sizer_grows_when_fast_and_shrinks_on_retries():
+    sizer = seed_data.AdaptiveBatchSizer("test", initial=1000, minimum=100, maximum=4000, target_seconds=1.0)
+
+    sizer.record(1000, 0.1)
+    assert sizer.next_size() == 1500
+    sizer.record(1500, 3.0)
+    assert sizer.next_size() == 500
+    sizer.record(500, 0.7, retries=2)
+    assert sizer.next_size() == 250
+    sizer.record(250, 0.1, failed=True)
+    assert sizer.next_size() == 125
+
+    assert sizer.trajectory == [1000, 1500, 500, 250, 125]
+    assert sizer.rows == 3000
+    assert sizer.retries == 2
+    assert sizer.failures == 1
+
+
+def test_write_rows_splits_a_batch_that_keeps_failing():
+    sizer = seed_data.AdaptiveBatchSizer("test", initial=100, minimum=1)
+    written = []
+
+    class FlakySession:
+        def execute_write(self, fn):
+            class Tx:
+                def run(self, query, rows):
+                    if len(rows) > 2:
+                        raise seed_data.TransientError("lock timeout")
+                    written.extend(rows)
+                    return self
+
+                def consume(self):
+                    return None
+
+            return fn(Tx())
+
+    seed_data.write_rows(FlakySession(), "UNWIND $rows AS row RETURN row", list(range(8)), sizer)
+
+    assert sorted(written) == list(range(8))
+    assert sizer.failures == 3
+
+
+def test_build_record_frame_parses_csv_dates_to_utc_datetimes():
+    df = _csv_rows().assign(**{"order date (DateOrders)": ["1/31/2018 22:56", None]})
+    frame = seed_data.build_record_frame(df)
+
+    first, second = frame["order_date"].tolist()
+    assert (first.year, first.month, first.day, first.hour, first.minute) == (2018, 1, 31, 22, 56)
+    assert str(first.tz) == "UTC"
+    assert second is None
+    # column missing from the CSV
+    assert frame["shipping_date"].tolist() == [None, None]
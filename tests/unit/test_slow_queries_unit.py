@@ -0,0 +1,105 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.database import queries
+from app.database.slow_queries import SlowQueryLog, flatten_plan
+from app.routers import admin as admin_router
+
+PLAN = {
+    "operatorType": "ProduceResults@neo4j",
+    "dbHits": 0,
+    "rows": 1,
+    "args": {"Details": "products, length"},
+    "children": [
+        {"operatorType": "ShortestPath@neo4j", "dbHits": 120, "rows": 1, "args": {}, "children": [
+            {"operatorType": "NodeUniqueIndexSeek@neo4j", "dbHits": 4, "rows": 2, "args": {}, "children": []},
+        ]},
+    ],
+}
+
+
+class _Summary:
+    profile = PLAN
+
+
+def _profiling_session_factory(mock_async_driver_factory, calls):
+    def _run(cypher, params):
+        calls.append(cypher)
+
+        class _Result:
+            async def consume(self):
+                return _Summary()
+
+        return _Result()
+
+    driver = mock_async_driver_factory(side_effect=_run)
+    return driver.session
+
+
+def test_flatten_plan_walks_operator_tree():
+    operators = flatten_plan(PLAN)
+
+    assert [op["operator"] for op in operators] == [
+        "ProduceResults@neo4j",
+        "ShortestPath@neo4j",
+        "NodeUniqueIndexSeek@neo4j",
+    ]
+    assert [op["depth"] for op in operators] == [0, 1, 2]
+    assert operators[1]["db_hits"] == 120
+
+
+def test_slow_query_is_profiled_once_per_interval(mock_async_driver_factory):
+    calls = []
+    log = SlowQueryLog(_profiling_session_factory(mock_async_driver_factory, calls), threshold_ms=100, min_interval=60)
+    params = {"from_id": 1, "to_id": 2}
+
+    async def _scenario():
+        assert not log.observe(queries.SHORTEST_PRODUCT_PATH, params, 0.05)  # fast
+        assert not log.observe("MATCH (n) RETURN n", {}, 5.0)  # not a registered query
+        assert not log.observe(queries.PAGERANK_STREAM, {}, 5.0)  # optional: could project a graph
+        assert log.observe(queries.SHORTEST_PRODUCT_PATH, params, 0.25)
+        assert not log.observe(queries.SHORTEST_PRODUCT_PATH, params, 0.30)  # rate limited
+        await log.drain()
+
+    asyncio.run(_scenario())
+
+    assert calls == ["PROFILE " + queries.SHORTEST_PRODUCT_PATH.text]
+    [entry] = log.entries()
+    assert entry["query"] == "analytics.shortest_product_path"
+    assert entry["observed_ms"] == 250.0
+    assert entry["total_db_hits"] == 124
+
+
+def test_sampling_can_skip_slow_queries(mock_async_driver_factory):
+    calls = []
+    log = SlowQueryLog(_profiling_session_factory(mock_async_driver_factory, calls), threshold_ms=1, sample_rate=0.0)
+
+    async def _scenario():
+        return log.observe(queries.TOP_PRODUCTS, {"limit": 10}, 1.0)
+
+    assert asyncio.run(_scenario()) is False
+    assert calls == []
+
+
+def test_admin_slow_queries_route(monkeypatch, mock_async_driver_factory):
+    log = SlowQueryLog(_profiling_session_factory(mock_async_driver_factory, []), threshold_ms=1)
+
+    async def _record():
+        log.observe(queries.LLM_RECOMMEND_2HOP, {"product_id": 1, "limit": 10}, 0.5)
+        await log.drain()
+
+    asyncio.run(_record())
+    monkeypatch.setattr(admin_router, "slow_query_log", log)
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "secret")
+
+    client = TestClient(main.app)
+    assert client.get("/admin/slow-queries").status_code == 403
+
+    resp = client.get("/admin/slow-queries", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["threshold_ms"] == 1
+    assert data["entries"][0]["query"] == "llm.recommend_2hop"
+    assert data["entries"][0]["operators"][1]["operator"] == "ShortestPath@neo4j"